@@ -0,0 +1,40 @@
+"""
+Benchmark de los motores de lectura de Excel para el recaudo de Bot 02.
+
+Lee el mismo archivo con cada motor soportado por pl.read_excel (incluye el cast a
+string de Bot 02) y muestra el tiempo de cada uno, para elegir el más rápido en
+[procesamiento] motor_excel de config.ini. openpyxl no lee archivos .xls.
+
+Uso:
+    python -m benchmarks.bench_motores_excel ruta/recaudo.xls [repeticiones]
+"""
+import sys
+import time
+import logging
+from modulos.bot_02_procesar_reporte import MOTORES_EXCEL, leer_recaudo
+
+logger = logging.getLogger("Benchmark - Motores Excel")
+
+
+def main(ruta: str, repeticiones: int = 3):
+    logging.basicConfig(level=logging.ERROR)
+    print(f"{'Motor':<12}{'Mejor (s)':>12}{'Filas':>12}")
+    for motor in MOTORES_EXCEL:
+        tiempos = []
+        filas = 0
+        try:
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                filas = len(leer_recaudo(ruta, motor))
+                tiempos.append(time.perf_counter() - inicio)
+        except Exception as e:
+            print(f"{motor:<12}{'error':>12}  {type(e).__name__}: {str(e).splitlines()[0]}")
+            continue
+        print(f"{motor:<12}{min(tiempos):>12.3f}{filas:>12,}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -0,0 +1,198 @@
+"""
+Benchmark de punta a punta, sin conexión, de Bot 02 y Bot 03 sobre recaudos sintéticos.
+
+Para cada tamaño genera (o reutiliza de benchmarks/datos) un recaudo con
+benchmarks.generar_recaudo y mide cada etapa del pipeline:
+  - lectura:        leer_recaudo de cada archivo y concat (o read_parquet con --formato parquet)
+  - procesar_df:    limpieza y validación de Bot 02
+  - intermedio:     renombre de columnas y guardar_intermedio en Arrow IPC
+  - txt_usd:        convertir_excel_a_txt de una moneda sobre el intermedio
+  - txt_monedas:    generar_txt_monedas de USD y PEN (lo que ejecuta Bot 03)
+
+Se toma el mejor tiempo de las repeticiones. Los resultados se guardan en
+benchmarks/resultados/pipeline_<fecha>.json y .csv; con --base se comparan contra un
+JSON anterior (Cambio = tiempo base / tiempo actual, mayor a 1x es más rápido).
+
+Uso:
+    python -m benchmarks.bench_pipeline [--tamanos 10000,100000,1000000] [--formato xlsx|parquet]
+                                        [--repeticiones 3] [--motor calamine] [--base resultados.json]
+"""
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+import polars as pl
+import psutil
+from benchmarks.generar_recaudo import MAX_FILAS_XLSX, escribir_recaudo, generar_recaudo
+from modulos.bot_02_procesar_reporte import MOTORES_EXCEL, RENOMBRE_COLUMNAS, guardar_intermedio, leer_recaudo, procesar_df
+from modulos.bot_03_obtener_archivos_bbva import convertir_excel_a_txt, generar_txt_monedas
+
+logger = logging.getLogger("Benchmark - Pipeline")
+
+CARPETA_BENCHMARKS = Path(__file__).parent
+ETAPAS = ("lectura", "procesar_df", "intermedio", "txt_usd", "txt_monedas")
+
+
+def archivos_recaudo(filas, formato, carpeta, semilla=42):
+    """
+    Retorna los archivos del recaudo sintético de `filas` filas, generándolos solo si
+    no existen en la carpeta (la escritura de XLSX grandes toma minutos).
+    """
+    ruta = Path(carpeta) / f"recaudo_{filas}_s{semilla}.{formato}"
+    if formato == "xlsx" and filas > MAX_FILAS_XLSX:
+        partes = math.ceil(filas / MAX_FILAS_XLSX)
+        rutas = [ruta.with_name(f"{ruta.stem}_parte{n:02d}.xlsx") for n in range(1, partes + 1)]
+    else:
+        rutas = [ruta]
+    if all(r.is_file() for r in rutas):
+        return rutas
+    print(f"Generando recaudo sintético de {filas:,} filas en {ruta.parent} ...")
+    inicio = time.perf_counter()
+    rutas = escribir_recaudo(generar_recaudo(filas, semilla), ruta)
+    print(f"  {len(rutas)} archivo(s) en {time.perf_counter() - inicio:.1f}s")
+    return rutas
+
+
+def leer_entrada(rutas, motor):
+    """Lee el recaudo como Bot 02: todas las columnas como texto, un archivo por ventana."""
+    if rutas[0].suffix == ".parquet":
+        return pl.concat([pl.read_parquet(r).select(pl.all().cast(pl.Utf8)) for r in rutas], how="diagonal")
+    return pl.concat([leer_recaudo(r, motor) for r in rutas], how="diagonal")
+
+
+def medir_tamano(filas, rutas, motor, repeticiones, temporal):
+    """Ejecuta el pipeline `repeticiones` veces y retorna {etapa: [segundos, ...]}."""
+    cfg_intermedio = {"intermedio": {"formato": "ipc"}}
+    tiempos = {etapa: [] for etapa in ETAPAS}
+    for repeticion in range(repeticiones):
+        carpeta = Path(temporal) / f"{filas}_{repeticion}"
+        carpeta.mkdir()
+
+        inicio = time.perf_counter()
+        df = leer_entrada(rutas, motor)
+        tiempos["lectura"].append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        df = procesar_df(df)
+        tiempos["procesar_df"].append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        ruta_intermedio = guardar_intermedio(df.rename(RENOMBRE_COLUMNAS), carpeta, "reporte", cfg_intermedio)
+        tiempos["intermedio"].append(time.perf_counter() - inicio)
+        del df
+
+        inicio = time.perf_counter()
+        convertir_excel_a_txt(str(carpeta / "usd.txt"), "USD", ruta_intermedio)
+        tiempos["txt_usd"].append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        generados = generar_txt_monedas(
+            {"USD": str(carpeta / "dolares.txt"), "PEN": str(carpeta / "soles.txt")}, ruta_intermedio
+        )
+        tiempos["txt_monedas"].append(time.perf_counter() - inicio)
+        if len(generados) != 2:
+            raise RuntimeError(f"Bot 03 no generó los dos TXT para {filas:,} filas")
+    return tiempos
+
+
+def entorno():
+    return {
+        "python": platform.python_version(),
+        "polars": pl.__version__,
+        "sistema": platform.platform(),
+        "cpus": os.cpu_count(),
+        "memoria_gb": round(psutil.virtual_memory().total / 1024**3, 1),
+    }
+
+
+def guardar_resultados(resultados, parametros, carpeta):
+    """Escribe pipeline_<fecha>.json y pipeline_<fecha>.csv; retorna la ruta del JSON."""
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    base = carpeta / f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    with open(base.with_suffix(".json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "entorno": entorno(),
+            "parametros": parametros,
+            "resultados": resultados,
+        }, f, indent=2, ensure_ascii=False)
+    with open(base.with_suffix(".csv"), "w", encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=["filas", "etapa", "segundos", "filas_por_s", "tiempos"])
+        escritor.writeheader()
+        for fila in resultados:
+            escritor.writerow(dict(fila, tiempos=" ".join(f"{t:.4f}" for t in fila["tiempos"])))
+    return base.with_suffix(".json")
+
+
+def imprimir_resultados(resultados, base=None):
+    """Tabla de resultados; con `base` (resultados anteriores) agrega la comparación."""
+    anteriores = {(r["filas"], r["etapa"]): r["segundos"] for r in base or []}
+    encabezado = f"{'Filas':>10}  {'Etapa':<12}{'Mejor (s)':>11}{'Filas/s':>14}"
+    if base is not None:
+        encabezado += f"{'Base (s)':>11}{'Cambio':>9}"
+    print(encabezado)
+    for fila in resultados:
+        linea = f"{fila['filas']:>10,}  {fila['etapa']:<12}{fila['segundos']:>11.3f}{fila['filas_por_s']:>14,}"
+        if base is not None:
+            anterior = anteriores.get((fila["filas"], fila["etapa"]))
+            if anterior:
+                linea += f"{anterior:>11.3f}{anterior / fila['segundos']:>8.2f}x"
+            else:
+                linea += f"{'-':>11}{'-':>9}"
+        print(linea)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sin conexión de Bot 02 y Bot 03 por tamaño de recaudo")
+    parser.add_argument("--tamanos", default="10000,100000,1000000",
+                        help="Tamaños en filas separados por coma (hasta 5000000)")
+    parser.add_argument("--formato", choices=["xlsx", "parquet"], default="xlsx",
+                        help="Formato del recaudo de entrada (parquet excluye el costo de leer Excel)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--motor", choices=MOTORES_EXCEL, default="calamine", help="Motor de lectura de Excel")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--datos", default=str(CARPETA_BENCHMARKS / "datos"),
+                        help="Carpeta donde se generan y reutilizan los recaudos sintéticos")
+    parser.add_argument("--resultados", default=str(CARPETA_BENCHMARKS / "resultados"))
+    parser.add_argument("--base", help="JSON de una ejecución anterior para comparar")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    tamanos = [int(t) for t in args.tamanos.split(",")]
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as temporal:
+        for filas in tamanos:
+            rutas = archivos_recaudo(filas, args.formato, args.datos, args.semilla)
+            tiempos = medir_tamano(filas, rutas, args.motor, args.repeticiones, temporal)
+            for etapa in ETAPAS:
+                mejor = min(tiempos[etapa])
+                resultados.append({
+                    "filas": filas,
+                    "etapa": etapa,
+                    "segundos": round(mejor, 4),
+                    "filas_por_s": round(filas / mejor) if mejor else 0,
+                    "tiempos": [round(t, 4) for t in tiempos[etapa]],
+                })
+            print(f"{filas:,} filas medidas")
+
+    parametros = {"formato": args.formato, "motor": args.motor, "repeticiones": args.repeticiones,
+                  "semilla": args.semilla}
+    ruta = guardar_resultados(resultados, parametros, args.resultados)
+    base = None
+    if args.base:
+        with open(args.base, "r", encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+    imprimir_resultados(resultados, base)
+    print(f"Resultados guardados en {ruta} y {ruta.with_suffix('.csv')}")
+
+
+if __name__ == "__main__":
+    main()
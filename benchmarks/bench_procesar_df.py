@@ -0,0 +1,84 @@
+"""
+Benchmark de procesar_df: implementación eager anterior vs plan LazyFrame.
+
+Genera un recaudo sintético en memoria con benchmarks.generar_recaudo (1M filas por
+defecto), ejecuta ambas versiones, verifica que produzcan el mismo resultado y muestra
+los tiempos.
+
+Uso:
+    python -m benchmarks.bench_procesar_df [filas]
+"""
+import sys
+import time
+import logging
+import polars as pl
+from modulos.bot_02_procesar_reporte import procesar_df
+from benchmarks.generar_recaudo import generar_recaudo
+from utilidades.reglas_documento import ReglasDocumento
+
+logger = logging.getLogger("Benchmark - procesar_df")
+
+
+def procesar_df_eager(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Referencia de la implementación eager anterior de procesar_df (sin logs):
+    un DataFrame nuevo por paso, limpieza y validación de longitud ejecutadas dos veces.
+    """
+    df = df.with_columns([
+        (
+            pl.col("Apellido Paterno").cast(pl.Utf8).str.strip_chars()
+            + pl.lit(" ")
+            + pl.col("Apellido Materno").cast(pl.Utf8).str.strip_chars()
+            + pl.lit(" ")
+            + pl.col("Nombres").cast(pl.Utf8).str.strip_chars()
+        ).str.replace_all(r"\s+", " ").str.strip_chars().alias("Nombres_Completos")
+    ])
+    df = df.drop(["Apellido Paterno", "Apellido Materno", "Nombres"])
+    df = df.rename({"Nombres_Completos": "Nombres"})
+    limpieza = [
+        pl.col("Nombres").str.strip_chars().str.to_uppercase().str.replace_all(r"[^A-Z\sÑÁÉÍÓÚÜ]", ""),
+        pl.col("Tipo Documento").str.strip_chars().str.to_uppercase(),
+        pl.col("Numero Documento").cast(pl.Utf8).str.strip_chars()
+    ]
+    df = df.with_columns(limpieza)
+    expected_length = pl.col("Tipo Documento").replace_strict({'DI': 8, 'RUC': 11, 'PT': 12, 'CE': 9}, default=0)
+    len(df.filter(pl.col("Numero Documento").str.len_chars() != expected_length))
+    mask_tipo = pl.col("Tipo Documento").is_in(["DI", "PT", "CE"])
+    mask_bin = pl.col("Bin").is_in(['489486', '422826', '519115', '483179'])
+    df = df.with_columns([
+        pl.when(mask_tipo & mask_bin).then(pl.col("Bin").str.strip_chars()).otherwise(pl.col("Bin")).alias("Bin")
+    ])
+    df = df.with_columns(limpieza)
+    expected_length = pl.col("Tipo Documento").replace_strict({'DI': 8, 'RUC': 11}, default=0)
+    len(df.filter(pl.col("Numero Documento").str.len_chars() != expected_length))
+    return df.drop("Fecha Activacion")
+
+
+def medir(funcion, *args, **kwargs):
+    """Ejecuta la función y retorna (resultado, segundos)."""
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def main(filas: int = 1_000_000):
+    logging.basicConfig(level=logging.ERROR)
+    print(f"Generando recaudo sintético de {filas:,} filas...")
+    df = generar_recaudo(filas)
+
+    esperado, t_eager = medir(procesar_df_eager, df)
+    # Mismas validaciones que la referencia: longitud por tipo y tipos finales (DI, RUC)
+    reglas = ReglasDocumento(reglas=["longitud", "tipo"])
+    lazy, t_lazy = medir(procesar_df, df, reglas=reglas)
+    streaming, t_streaming = medir(procesar_df, df, streaming=True, reglas=reglas)
+
+    assert lazy.equals(esperado), "El plan lazy no coincide con la implementación eager"
+    assert streaming.equals(esperado), "El plan streaming no coincide con la implementación eager"
+
+    print(f"{'Versión':<20}{'Segundos':>10}{'Speedup':>10}")
+    for nombre, segundos in [("eager", t_eager), ("lazy", t_lazy), ("lazy streaming", t_streaming)]:
+        print(f"{nombre:<20}{segundos:>10.3f}{t_eager / segundos:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
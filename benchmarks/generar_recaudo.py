@@ -0,0 +1,168 @@
+"""
+Generador de recaudos sintéticos con el layout del export de Super Admin.
+
+Escribe archivos de cualquier tamaño (10k a 5M filas) con las columnas Fecha, Codigo,
+Tipo Documento, Numero Documento, Apellido Paterno, Apellido Materno, Nombres, Bin y
+Fecha Activacion. Una fracción de las filas trae los datos sucios que limpia procesar_df:
+espacios laterales y dobles, minúsculas, dígitos y signos en los nombres, tipos de
+documento en minúscula, documentos con longitud inválida (sin el primer dígito, como
+un DNI que perdió el cero inicial al pasar por Excel),
+BIN con espacios o fuera de la lista y apellido materno vacío.
+
+La generación es columnar (hash de Polars sobre el índice de fila, sin bucles Python) y
+determinística para una misma semilla.
+
+Formatos de salida:
+  - .xlsx: el formato que lee Bot 02. Excel admite 1.048.576 filas por hoja, así que los
+    tamaños mayores se reparten en varios archivos (recaudo_parte01.xlsx, ...), igual que
+    las ventanas de fechas que descarga Bot 01.
+  - .parquet: un solo archivo, para medir procesar_df sin el costo de leer Excel.
+  El .xls (BIFF) del export real no se puede escribir con las librerías del proyecto;
+  Bot 02 lee ambos formatos con el mismo motor de pl.read_excel.
+
+Uso:
+    python -m benchmarks.generar_recaudo filas [--salida ruta.xlsx|ruta.parquet] [--semilla 42] [--sucias 0.05]
+"""
+import argparse
+import time
+from pathlib import Path
+import polars as pl
+from utilidades.lotes import MAX_FILAS_XLSX
+from utilidades.reglas_documento import digito_verificador_ruc
+
+NOMBRES = ["juan", "maria", "jose luis", "ana", "carlos", "rosa", "pedro", "lucia", "miguel angel",
+           "carmen", "luis", "elena", "jorge", "sofia", "victor hugo", "patricia"]
+APELLIDOS = ["perez", "garcia", "quispe", "mamani", "flores", "rodriguez", "ñañez", "gutiérrez",
+             "huamán", "chávez", "torres", "ramírez", "díaz", "vásquez", "castillo", "mendoza"]
+# Distribución aproximada del recaudo: mayoría de DNI
+TIPOS_DOCUMENTO = ["DI"] * 14 + ["RUC", "RUC", "CE", "PT"]
+LONGITUD_DOCUMENTO = {"DI": 8, "RUC": 11, "CE": 9, "PT": 12}
+BINES = ["489486", "422826", "519115", "483179"]
+BINES_FUERA_DE_LISTA = ["400000", "455788"]
+
+
+def _aleatorio(semilla: int, columna: int) -> pl.Expr:
+    """Entero pseudoaleatorio (u64) por fila, independiente para cada columna."""
+    return pl.int_range(pl.len(), dtype=pl.UInt64).hash(semilla * 1_000 + columna)
+
+
+def _elegir(opciones, semilla: int, columna: int) -> pl.Expr:
+    """Elige un valor de `opciones` por fila."""
+    indice = (_aleatorio(semilla, columna) % len(opciones)).cast(pl.UInt32)
+    return pl.lit(pl.Series(opciones)).gather(indice)
+
+
+def _sucia(proporcion: float, semilla: int, columna: int) -> pl.Expr:
+    """Máscara booleana que marca aproximadamente `proporcion` de las filas."""
+    return (_aleatorio(semilla, columna) % 10_000) < int(proporcion * 10_000)
+
+
+def generar_recaudo(filas: int, semilla: int = 42, proporcion_sucia: float = 0.05) -> pl.DataFrame:
+    """
+    Genera un DataFrame con el layout del recaudo (todas las columnas como texto).
+
+    :param proporcion_sucia: Fracción de filas afectadas por cada tipo de dato sucio.
+    """
+    p = proporcion_sucia
+    tipo = _elegir(TIPOS_DOCUMENTO, semilla, 1)
+    longitud = tipo.replace_strict(LONGITUD_DOCUMENTO, return_dtype=pl.Int64)
+    # Documento con la longitud del tipo; los RUC empiezan en 10 (persona) o 20 (empresa)
+    # y terminan en su dígito verificador
+    digitos = (_aleatorio(semilla, 2) % 10**12).cast(pl.Utf8).str.zfill(12)
+    base_ruc = _elegir(["10", "20"], semilla, 3) + digitos.str.slice(0, 8)
+    documento = (
+        pl.when(tipo == "RUC")
+        .then(base_ruc + digito_verificador_ruc(base_ruc).cast(pl.Utf8))
+        .otherwise(digitos.str.slice(0, longitud))
+    )
+    fecha_activacion = (
+        pl.date(2020, 1, 1) + pl.duration(days=_aleatorio(semilla, 4) % 2_000)
+    ).dt.strftime("%Y-%m-%d")
+
+    columnas = pl.select(Fecha=pl.repeat("2025-01-01", filas, dtype=pl.Utf8)).with_columns(
+        Codigo=pl.int_range(1, pl.len() + 1).cast(pl.Utf8),
+        **{
+            "Tipo Documento": tipo,
+            "Numero Documento": documento,
+            "Apellido Paterno": _elegir(APELLIDOS, semilla, 5),
+            "Apellido Materno": _elegir(APELLIDOS, semilla, 6),
+            "Nombres": _elegir(NOMBRES, semilla, 7),
+            "Bin": _elegir(BINES, semilla, 8),
+            "Fecha Activacion": fecha_activacion,
+        }
+    )
+
+    # Datos sucios, cada uno sobre una fracción independiente de las filas
+    return columnas.with_columns(**{
+        "Tipo Documento": pl.when(_sucia(p, semilla, 10))
+        .then(pl.lit(" ") + pl.col("Tipo Documento").str.to_lowercase() + pl.lit(" "))
+        .otherwise(pl.col("Tipo Documento")),
+        "Numero Documento": pl.when(_sucia(p, semilla, 11))
+        .then(pl.col("Numero Documento").str.slice(1))  # Sin el primer dígito, como un DNI sin su 0
+        .when(_sucia(p, semilla, 12))
+        .then(pl.lit(" ") + pl.col("Numero Documento") + pl.lit("  "))
+        .otherwise(pl.col("Numero Documento")),
+        "Apellido Paterno": pl.when(_sucia(p, semilla, 13))
+        .then(pl.col("Apellido Paterno").str.to_uppercase() + pl.lit("  "))
+        .otherwise(pl.col("Apellido Paterno")),
+        "Apellido Materno": pl.when(_sucia(p / 5, semilla, 14))
+        .then(None)  # Sin apellido materno: la celda llega vacía
+        .when(_sucia(p, semilla, 15))
+        .then(pl.lit(" ") + pl.col("Apellido Materno") + pl.lit(" "))
+        .otherwise(pl.col("Apellido Materno")),
+        "Nombres": pl.when(_sucia(p, semilla, 16))
+        .then(pl.col("Nombres") + _elegir(["1", " .", "  ", "-", " (2)", "@"], semilla, 17))
+        .when(_sucia(p, semilla, 18))
+        .then(pl.col("Nombres").str.replace(" ", "   "))
+        .otherwise(pl.col("Nombres")),
+        "Bin": pl.when(_sucia(p, semilla, 19))
+        .then(pl.lit(" ") + pl.col("Bin"))
+        .when(_sucia(p, semilla, 20))
+        .then(_elegir(BINES_FUERA_DE_LISTA, semilla, 21))
+        .otherwise(pl.col("Bin")),
+    })
+
+
+def escribir_recaudo(df: pl.DataFrame, ruta) -> list:
+    """
+    Escribe el recaudo en .xlsx (en partes de hasta MAX_FILAS_XLSX filas) o .parquet.
+    Retorna la lista de archivos generados.
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    sufijo = ruta.suffix.lower()
+    if sufijo == ".parquet":
+        df.write_parquet(ruta)
+        return [ruta]
+    if sufijo != ".xlsx":
+        raise ValueError(f"Formato no soportado: {sufijo} (use .xlsx o .parquet)")
+    if df.height <= MAX_FILAS_XLSX:
+        df.write_excel(ruta, autofit=False)
+        return [ruta]
+    rutas = []
+    for numero, parte in enumerate(df.iter_slices(MAX_FILAS_XLSX), start=1):
+        ruta_parte = ruta.with_name(f"{ruta.stem}_parte{numero:02d}.xlsx")
+        parte.write_excel(ruta_parte, autofit=False)
+        rutas.append(ruta_parte)
+    return rutas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un recaudo sintético con el layout de Super Admin")
+    parser.add_argument("filas", type=int, help="Cantidad de filas (ej. 10000, 1000000, 5000000)")
+    parser.add_argument("--salida", default="recaudo.xlsx", help="Archivo .xlsx o .parquet de salida")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sucias", type=float, default=0.05,
+                        help="Fracción de filas con cada tipo de dato sucio")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df = generar_recaudo(args.filas, args.semilla, args.sucias)
+    rutas = escribir_recaudo(df, args.salida)
+    print(f"{df.height:,} filas en {time.perf_counter() - inicio:.1f}s:")
+    for ruta in rutas:
+        print(f"  {ruta}")
+
+
+if __name__ == "__main__":
+    main()
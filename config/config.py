@@ -16,4 +16,11 @@ def cargar_configuracion():
 
         return config
     except Exception as e:
-        raise e
\ No newline at end of file
+        raise e
+
+
+def lista_config(valor):
+    """ConfigObj entrega listas para valores con comas y str para un solo valor."""
+    if isinstance(valor, (list, tuple)):
+        return [v.strip() for v in valor if v.strip()]
+    return [v.strip() for v in str(valor).split(",") if v.strip()]
@@ -3,13 +3,21 @@ import variables_globales as vg
 from utilidades.limpieza import cerrarProcesos as Limpieza
 from modulos.bot_00_configuracion import bot_run as Bot_00_Configuracion
 from modulos.bot_01_super_admin import bot_run as Bot_01_SuperAdmin
+from modulos.bot_01_super_admin import confirmar_huellas
 from modulos.bot_02_procesar_reporte import bot_run as Bot_02_ProcesarReporte
 from modulos.bot_03_obtener_archivos_bbva import bot_run as Bot_03_ObtenerArchivosBBVA
 from modulos.bot_04_cargar_bbva_soles import bot_run as Bot_04_CargarBBVASoles
 from modulos.bot_05_cargar_bbva_dolares import bot_run as Bot_05_CargarBBVADolares
+from modulos.bot_04_05_cargar_bbva import bot_run as Bot_04_05_CargarBBVA
 from utilidades.notificaiones_whook import WebhookNotifier
+from utilidades.bbva_netcash import cerrar_pool_navegadores
+from utilidades.manifiesto import Manifiesto
+from utilidades.orquestador import Nodo, Orquestador, configurar_nodos
+from utilidades.instrumentacion import Instrumentacion
+from utilidades.historial import registrar_ejecucion
 
 from datetime import datetime
+import argparse
 import traceback
 import platform
 import os
@@ -41,7 +49,19 @@ def obtener_info_sistema():
         return {"error": str(e)}
 
 
-def main():
+# Salidas de Bot 01 (variables_globales) que se registran en el manifiesto de ejecución
+SALIDAS_DESCARGA = ["archivos_entrada", "recaudo_sha256", "bytes_descargados", "huellas_pendientes", "sin_cambios"]
+
+# Salidas que registran avance parcial: al reanudar un paso fallido con las mismas entradas
+# se restauran para no repetir lo que ya terminó (ej. una moneda ya subida a BBVA)
+SALIDAS_CARGA_COMBINADA = ["monedas_cargadas"]
+
+
+def main(reanudar=False):
+    """
+    Ejecuta el pipeline de bots. Con reanudar=True se omiten los pasos que terminaron bien
+    en la ejecución anterior y cuyas entradas no cambiaron (ver utilidades/manifiesto.py).
+    """
     inicio = datetime.now()
     
     # Limpieza de ambiente
@@ -59,7 +79,8 @@ def main():
     try:
         # Configuración del bot
         logger.info("Cargando configuración del sistema...")
-        cfg = Bot_00_Configuracion()
+        # Al reanudar no se limpia input: ahí están las descargas de la ejecución anterior
+        cfg = Bot_00_Configuracion(limpiar_input=not reanudar)
         if not cfg:
             logger.error("Error al cargar la configuración. Abortando proceso.")
             vg.system_exception = True
@@ -71,17 +92,90 @@ def main():
         # Notificación de inicio
         #notificaion.send_notification("Inicio del proceso tipo de cambio PayPal")
 
-        # Ejecución de los bots
-        for bot_name, bot_function in [
-            ("Bot 01 - Descargar Recaudo", Bot_01_SuperAdmin),
-            ("Bot 02 - Procesar Reporte", Bot_02_ProcesarReporte),
-            ("Bot 03 - Obtener Archivos BBVA", Bot_03_ObtenerArchivosBBVA),
-            ("Bot 04 - Cargar BBVA Soles", Bot_04_CargarBBVASoles), 
-            ("Bot 05 - Cargar BBVA Dólares", Bot_05_CargarBBVADolares)
-        ]:
-            logger.info(f"==================== INICIANDO {bot_name} ====================")
-            resultado, mensaje = bot_function(cfg, bot_name)
-            webhook.send_notification(f"Bot {bot_name} finalizado con resultado: {resultado} y mensaje: {mensaje}")
+        # Pipeline como grafo: las dependencias salen de las entradas/salidas de cada bot
+        manifiesto = Manifiesto(cfg, reanudar=reanudar)
+        nodos = [
+            Nodo("bot_01", "Bot 01 - Descargar Recaudo", Bot_01_SuperAdmin,
+                 ["cfg.recaudo", "fecha"], SALIDAS_DESCARGA),
+            Nodo("bot_02", "Bot 02 - Procesar Reporte", Bot_02_ProcesarReporte,
+                 ["vg.archivos_entrada", "cfg.procesamiento", "cfg.intermedio", "cfg.validacion", "cfg.delta"],
+                 ["archivo_intermedio", "archivo_recaudo", "archivo_rechazados", "envios_pendientes", "sin_novedades"]),
+            Nodo("bot_03", "Bot 03 - Obtener Archivos BBVA", Bot_03_ObtenerArchivosBBVA,
+                 ["vg.archivo_intermedio", "vg.archivo_recaudo", "cfg.salidas_bbva"], ["archivos_txt"]),
+        ]
+        entradas_carga = ["vg.archivo_recaudo", "vg.archivos_txt"]
+        if str(cfg.get("bbva", {}).get("carga_combinada", "False")).lower() == "true":
+            # Soles y dólares en una sola sesión de navegador (un solo login)
+            nodos.append(Nodo("bot_04_05", "Bot 04/05 - Cargar BBVA Soles y Dólares", Bot_04_05_CargarBBVA,
+                              entradas_carga, SALIDAS_CARGA_COMBINADA))
+        else:
+            # Sin dependencia entre sí: el orquestador los ejecuta en paralelo
+            nodos += [
+                Nodo("bot_04", "Bot 04 - Cargar BBVA Soles", Bot_04_CargarBBVASoles, entradas_carga),
+                Nodo("bot_05", "Bot 05 - Cargar BBVA Dólares", Bot_05_CargarBBVADolares, entradas_carga),
+            ]
+        configurar_nodos(nodos, cfg)
+        # Tiempo, CPU y memoria por bot (incluye los procesos de Chrome)
+        instrumentacion = Instrumentacion(cfg)
+        for nodo in nodos:
+            nodo.funcion = instrumentacion.instrumentar(nodo.nombre, nodo.funcion)
+        huellas = {}
+
+        def omitir(nodo, dependencias_omitidas):
+            huellas[nodo.clave] = manifiesto.huella_entradas(nodo.entradas)
+            if manifiesto.puede_omitir(nodo.nombre, huellas[nodo.clave], dependencias_omitidas):
+                manifiesto.restaurar(nodo.nombre)
+                return True
+            if nodo.clave == "bot_04_05":
+                # Solo se suben las monedas que no quedaron confirmadas en la ejecución anterior
+                manifiesto.restaurar_parcial(nodo.nombre, huellas[nodo.clave], SALIDAS_CARGA_COMBINADA)
+            return False
+
+        def al_terminar(nodo, resultado):
+            if resultado.estado == "omitido":
+                webhook.send_notification(f"Bot {nodo.nombre} omitido al reanudar (sin cambios desde la ejecución anterior)")
+            else:
+                manifiesto.registrar(nodo.nombre, resultado.resultado, resultado.mensaje, huellas[nodo.clave], nodo.salidas)
+                webhook.send_notification(
+                    f"Bot {nodo.nombre} finalizado con resultado: {resultado.resultado} y mensaje: {resultado.mensaje}"
+                )
+            if vg.sin_cambios:
+                logger.info("El recaudo no cambió desde la última ejecución exitosa. Se omiten los bots restantes.")
+                webhook.send_notification("Recaudo sin cambios: se omite el procesamiento y la carga a BBVA")
+                return True
+            if vg.sin_novedades:
+                logger.info("Modo delta: no hay afiliaciones nuevas ni cambiadas. Se omite la carga a BBVA.")
+                webhook.send_notification("Modo delta sin afiliaciones nuevas: se omite la carga a BBVA")
+                return True
+            return False
+
+        max_workers = int(cfg.get("orquestador", {}).get("max_workers", 2))
+        resultados = Orquestador(nodos, max_workers=max_workers).ejecutar(cfg, omitir, al_terminar)
+        try:
+            instrumentacion.guardar(cfg["rutas"]["ruta_log"])
+            webhook.send_notification(instrumentacion.resumen_texto())
+        except Exception as e:
+            logger.warning(f"No se pudieron guardar las métricas de la ejecución: {e}")
+        try:
+            # Historial entre ejecuciones (reporte: python -m utilidades.historial)
+            registrar_ejecucion(
+                cfg, inicio, resultados, instrumentacion.metricas,
+                {nodo.clave: nodo.nombre for nodo in nodos}, reanudada=reanudar
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo registrar la ejecución en el historial: {e}")
+        if vg.sin_cambios:
+            manifiesto.finalizar(True)
+        elif vg.sin_novedades:
+            # El recaudo se procesó completo; solo no había nada nuevo que cargar
+            confirmar_huellas(cfg)
+            manifiesto.finalizar(True)
+        else:
+            exito = all(resultado.exitoso for resultado in resultados.values())
+            # Las huellas del recaudo solo se confirman si todo el pipeline terminó bien
+            if exito:
+                confirmar_huellas(cfg)
+            manifiesto.finalizar(exito)
         
     except Exception as e:
         logger.error(f"Error en main: {e}")
@@ -89,6 +183,8 @@ def main():
         webhook.send_notification(f"Error en main: {e}")
 
     finally:
+        # Navegadores que Bots 04/05 dejaron en el pool
+        cerrar_pool_navegadores()
         # Calcular tiempo total de ejecución
         fin = datetime.now()
         tiempo_total = fin - inicio
@@ -99,4 +195,10 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Orquestador del envío de recaudo a BBVA")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Reanudar desde el primer paso fallido o con entradas cambiadas de la ejecución anterior"
+    )
+    args = parser.parse_args()
+    main(reanudar=args.resume)
\ No newline at end of file
@@ -10,7 +10,12 @@ logger = logging.getLogger("Bot 00 - Configurador")
 
 load_dotenv()
 
-def bot_run():
+def bot_run(limpiar_input=True):
+    """
+    Carga la configuración y prepara las carpetas de trabajo.
+
+    :param limpiar_input: Si es False se conservan los archivos de input (modo --resume).
+    """
 
     try:
         # Funcion para cargar el archivo de configuración
@@ -37,7 +42,7 @@ def bot_run():
         input_path = Path(cfg["rutas"]["ruta_input"])
         if not input_path.exists():
             input_path.mkdir(parents=True)
-        else:
+        elif limpiar_input:
             # Limpiar todos los archivos y carpetas dentro de input
             for item in input_path.iterdir():
                 if item.is_file():
@@ -54,6 +59,9 @@ def bot_run():
         if not Path(cfg["rutas"]["ruta_output"]).exists():
             Path(cfg["rutas"]["ruta_output"]).mkdir(parents=True)
 
+        # Se crea la carpeta de estado persistente entre ejecuciones (no se limpia)
+        Path(cfg["rutas"]["ruta_estado"]).mkdir(parents=True, exist_ok=True)
+
         # Inicializar logger
         init_logger(nivel=logging.INFO)
         logger.info("Inicio del proceso ...")
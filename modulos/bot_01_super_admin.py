@@ -1,13 +1,35 @@
 import logging
 import configparser
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import json
+import time
+import shutil
+import hashlib
 from pathlib import Path
 from utilidades.excepciones import BusinessException
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import variables_globales as vg
+from utilidades.instrumentacion import registrar
 
 logger = logging.getLogger("Bot 01 - Super Admin")
 
+# Tamaño de bloque para la descarga en streaming del recaudo (1 MB)
+TAMANO_CHUNK = 1024 * 1024
+
+# Días que cubre cada ventana en el modo de descarga por rango de fechas
+DIAS_POR_VENTANA = {"dia": 1, "semana": 7}
+
+# Archivo (dentro de ruta_estado) con las cookies de la sesión de Super Admin
+ARCHIVO_CACHE_SESION = "sesion_superadmin.json"
+
+# Manifiesto de huellas del recaudo y carpeta con la última copia de cada ventana
+MANIFIESTO_RECAUDO = "manifiesto_recaudo.json"
+CARPETA_CACHE_RECAUDO = "recaudo_cache"
+MAX_ENTRADAS_MANIFIESTO = 62
+
 def super_admin_login(cfg):
     username = cfg["env_vars"]["super_admin_user"]
     password = cfg["env_vars"]["super_admin_pwd"]
@@ -44,20 +66,355 @@ def super_admin_login(cfg):
     else:
         raise BusinessException(f"Error en la solicitud de inicio de sesión: {login_response.status_code}")
 
-def descargar_recaudo(cfg, session):
+def ruta_cache_sesion(cfg):
+    """
+    Ruta del archivo donde se guardan las cookies de la sesión de Super Admin.
+    """
+    return Path(cfg["rutas"]["ruta_estado"]) / ARCHIVO_CACHE_SESION
+
+def cache_sesion_habilitado(cfg):
+    """
+    La caché de sesión requiere ttl_minutos > 0 y una URL de prueba ([url] url_sesion_probe):
+    sin la prueba no hay forma de detectar una sesión cerrada en el servidor.
+    """
+    if int(cfg.get("sesion", {}).get("ttl_minutos", 30)) <= 0:
+        return False
+    if not cfg["url"].get("url_sesion_probe"):
+        logger.warning("Caché de sesión deshabilitada: falta [url] url_sesion_probe en config.ini")
+        return False
+    return True
+
+def guardar_sesion(cfg, session):
+    """
+    Guarda en disco el cookie jar autenticado junto con su fecha de expiración.
+    El archivo se crea con permisos de solo lectura/escritura para el usuario.
+    """
+    if not cache_sesion_habilitado(cfg):
+        return
+    ttl_minutos = int(cfg["sesion"]["ttl_minutos"])
+    ruta = ruta_cache_sesion(cfg)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    datos = {
+        "expira": time.time() + ttl_minutos * 60,
+        "cookies": [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expires": cookie.expires,
+                "secure": cookie.secure,
+            }
+            for cookie in session.cookies
+        ],
+    }
+    descriptor = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+        json.dump(datos, f)
+    logger.info(f"Sesión de Super Admin guardada en {ruta} (vigencia {ttl_minutos} minutos)")
+
+def invalidar_sesion(cfg):
+    """
+    Elimina la sesión guardada para forzar un login completo en la siguiente ejecución.
+    """
+    ruta = ruta_cache_sesion(cfg)
+    if ruta.exists():
+        ruta.unlink()
+        logger.info("Sesión de Super Admin guardada eliminada")
+
+def cargar_sesion_guardada(cfg):
+    """
+    Restaura la sesión guardada si no expiró y responde correctamente a la petición de
+    prueba ([url] url_sesion_probe).
+
+    :return: requests.Session autenticada o None si hay que iniciar sesión de nuevo.
+    """
+    ruta = ruta_cache_sesion(cfg)
+    if not ruta.exists() or not cache_sesion_habilitado(cfg):
+        return None
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"No se pudo leer la sesión guardada: {e}")
+        return None
+    if datos.get("expira", 0) <= time.time():
+        logger.info("La sesión guardada de Super Admin expiró")
+        return None
+
+    session = requests.Session()
+    for cookie in datos.get("cookies", []):
+        session.cookies.set(
+            cookie["name"], cookie["value"],
+            domain=cookie["domain"], path=cookie["path"],
+            expires=cookie["expires"], secure=cookie["secure"],
+        )
+
+    url_probe = f"{cfg['url']['url_superadmin']}{cfg['url']['url_sesion_probe']}"
+    try:
+        respuesta = session.get(url_probe, allow_redirects=False, timeout=15)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Error en la petición de prueba de la sesión guardada: {e}")
+        return None
+    if respuesta.status_code != 200:
+        logger.info(f"La sesión guardada no es válida (probe: {respuesta.status_code})")
+        return None
+    logger.info("Reutilizando sesión guardada de Super Admin")
+    return session
+
+def obtener_sesion(cfg):
+    """
+    Retorna una sesión autenticada, reutilizando la guardada en disco si sigue siendo
+    válida y haciendo login completo solo cuando es necesario.
+
+    :return: Tupla (session, reutilizada), donde reutilizada indica si vino de la caché.
+    """
+    session = cargar_sesion_guardada(cfg)
+    if session is not None:
+        return session, True
+    session = super_admin_login(cfg)
+    guardar_sesion(cfg, session)
+    return session, False
+
+def guardar_descarga(response, destino, tamano_chunk=TAMANO_CHUNK):
+    """
+    Escribe la respuesta en disco por bloques a medida que llegan los bytes.
+
+    Los bloques se escriben en un archivo temporal en la misma carpeta, que se renombra
+    al destino final solo cuando la descarga termina (rename atómico). El SHA-256 se
+    calcula durante la descarga.
+
+    :return: Tupla (bytes descargados, sha256 en hexadecimal).
+    """
+    temporal = f"{destino}.part"
+    sha256 = hashlib.sha256()
+    total_bytes = 0
+    inicio = time.perf_counter()
+    try:
+        with open(temporal, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=tamano_chunk):
+                if chunk:
+                    f.write(chunk)
+                    sha256.update(chunk)
+                    total_bytes += len(chunk)
+        os.replace(temporal, destino)
+    except Exception:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    finally:
+        response.close()
+
+    segundos = max(time.perf_counter() - inicio, 1e-6)
+    logger.info(
+        f"Descarga completada: {total_bytes} bytes en {segundos:.2f}s "
+        f"({total_bytes / (1024 * 1024) / segundos:.2f} MB/s), sha256={sha256.hexdigest()}"
+    )
+    return total_bytes, sha256.hexdigest()
+
+def cargar_manifiesto(cfg):
+    """
+    Lee el manifiesto de huellas de recaudo (clave de ventana -> etag, last_modified, sha256).
+    """
+    ruta = Path(cfg["rutas"]["ruta_estado"]) / MANIFIESTO_RECAUDO
+    if not ruta.exists():
+        return {}
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"No se pudo leer el manifiesto de recaudo, se ignora: {e}")
+        return {}
+
+def confirmar_huellas(cfg):
+    """
+    Guarda en el manifiesto las huellas descargadas en esta ejecución.
+
+    Se llama al terminar el pipeline con éxito: si un bot posterior falla, las huellas no
+    se confirman y la siguiente ejecución vuelve a procesar el mismo recaudo.
+    Solo se conservan las MAX_ENTRADAS_MANIFIESTO ventanas más recientes y sus copias.
+    """
+    if not vg.huellas_pendientes:
+        return
+    manifiesto = cargar_manifiesto(cfg)
+    manifiesto.update(vg.huellas_pendientes)
+    claves = sorted(manifiesto, reverse=True)
+    carpeta_cache = Path(cfg["rutas"]["ruta_estado"]) / CARPETA_CACHE_RECAUDO
+    for clave in claves[MAX_ENTRADAS_MANIFIESTO:]:
+        del manifiesto[clave]
+        (carpeta_cache / f"{clave}.xls").unlink(missing_ok=True)
+
+    ruta = Path(cfg["rutas"]["ruta_estado"]) / MANIFIESTO_RECAUDO
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2)
+    logger.info(f"Manifiesto de recaudo actualizado: {len(vg.huellas_pendientes)} ventanas confirmadas")
+    vg.huellas_pendientes = {}
+
+def descargar_ventana(cfg, session, fecha_inicio, fecha_fin, nombre_archivo, huella_previa=None):
+    """
+    Descarga el recaudo de un rango de fechas (inclusive) en la carpeta de input.
+
+    Si hay una huella previa de la misma ventana, la petición se hace condicional con
+    ETag/Last-Modified. Ante un 304 se reutiliza la copia guardada en ruta_estado; si el
+    servidor no soporta peticiones condicionales se compara el SHA-256 del contenido.
+
+    :return: Diccionario con ruta, bytes, sha256, etag, last_modified y sin_cambios.
+    """
     base_url = cfg["url"]["url_superadmin"]
-    fechas_recaudo = datetime.now().strftime("%d/%m/%Y%%20-%%20%d/%m/%Y")
+    fechas_recaudo = f"{fecha_inicio:%d/%m/%Y}%20-%20{fecha_fin:%d/%m/%Y}"
     url_descarga = f"{base_url}{cfg['url']['url_recaudo_descarga']}{fechas_recaudo}"
-    response = session.get(url_descarga)
+    clave = f"{fecha_inicio:%Y%m%d}-{fecha_fin:%Y%m%d}"
+    input_path = os.path.join(cfg['rutas']['ruta_input'], nombre_archivo)
+    copia_cache = Path(cfg["rutas"]["ruta_estado"]) / CARPETA_CACHE_RECAUDO / f"{clave}.xls"
+
+    headers = {}
+    if huella_previa and copia_cache.exists():
+        if huella_previa.get("etag"):
+            headers["If-None-Match"] = huella_previa["etag"]
+        if huella_previa.get("last_modified"):
+            headers["If-Modified-Since"] = huella_previa["last_modified"]
+
+    response = session.get(url_descarga, stream=True, headers=headers)
+    if response.status_code == 304:
+        response.close()
+        shutil.copyfile(copia_cache, input_path)
+        logger.info(f"Recaudo {fecha_inicio:%d/%m/%Y} - {fecha_fin:%d/%m/%Y} sin cambios (304), se usa la copia guardada")
+        return {"clave": clave, "ruta": input_path, "bytes": 0, "sin_cambios": True, **huella_previa}
     if response.status_code == 200:
-        logger.info(f"Recaudo descargado correctamente")                
-        input_path = os.path.join(cfg['rutas']['ruta_input'], 'recaudo.xls')
-        with open(input_path, 'wb') as f:
-            f.write(response.content)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        total_bytes, sha256 = guardar_descarga(response, input_path)
+        sin_cambios = bool(huella_previa) and huella_previa.get("sha256") == sha256
+        if not sin_cambios or not copia_cache.exists():
+            copia_cache.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(input_path, copia_cache)
+        logger.info(f"Recaudo {fecha_inicio:%d/%m/%Y} - {fecha_fin:%d/%m/%Y} descargado correctamente")
         logger.info(f"Archivo guardado en: {input_path}")
-        return input_path
+        if sin_cambios:
+            logger.info(f"El recaudo {fecha_inicio:%d/%m/%Y} - {fecha_fin:%d/%m/%Y} no cambió (mismo SHA-256)")
+        return {
+            "clave": clave, "ruta": input_path, "bytes": total_bytes, "sin_cambios": sin_cambios,
+            "sha256": sha256, "etag": etag, "last_modified": last_modified,
+        }
+    else:
+        response.close()
+        raise BusinessException(
+            f"Error al descargar el recaudo {fecha_inicio:%d/%m/%Y} - {fecha_fin:%d/%m/%Y}: {response.status_code}"
+        )
+
+def registrar_descargas(cfg, descargas):
+    """
+    Registra en vg los bytes, la huella del conjunto y las huellas pendientes de confirmar,
+    y marca vg.sin_cambios cuando ninguna ventana cambió respecto del manifiesto.
+
+    :return: Lista de rutas descargadas, en el orden recibido.
+    """
+    vg.bytes_descargados = sum(descarga["bytes"] for descarga in descargas)
+    if len(descargas) == 1:
+        vg.recaudo_sha256 = descargas[0]["sha256"]
     else:
-        raise BusinessException(f"Error al descargar el recaudo: {response.status_code}")
+        # Huella del conjunto: hash de los hashes de cada ventana en orden de fecha
+        vg.recaudo_sha256 = hashlib.sha256("".join(d["sha256"] for d in descargas).encode()).hexdigest()
+    vg.huellas_pendientes = {
+        descarga["clave"]: {
+            "sha256": descarga["sha256"],
+            "etag": descarga.get("etag"),
+            "last_modified": descarga.get("last_modified"),
+        }
+        for descarga in descargas
+    }
+    omitir = str(cfg.get("recaudo", {}).get("omitir_sin_cambios", "True")).lower() == "true"
+    vg.sin_cambios = omitir and all(descarga["sin_cambios"] for descarga in descargas)
+    if vg.sin_cambios:
+        logger.info("El recaudo no cambió desde la última ejecución confirmada")
+    return [descarga["ruta"] for descarga in descargas]
+
+def descargar_recaudo(cfg, session):
+    hoy = datetime.now()
+    clave = f"{hoy:%Y%m%d}-{hoy:%Y%m%d}"
+    descarga = descargar_ventana(cfg, session, hoy, hoy, 'recaudo.xls', cargar_manifiesto(cfg).get(clave))
+    return registrar_descargas(cfg, [descarga])[0]
+
+def generar_ventanas(fecha_inicio, fecha_fin, ventana="dia"):
+    """
+    Divide un rango de fechas (inclusive) en ventanas diarias o semanales.
+
+    :return: Lista de tuplas (inicio, fin) ordenadas por fecha.
+    """
+    if fecha_fin < fecha_inicio:
+        raise BusinessException(f"Rango de fechas inválido: {fecha_inicio:%d/%m/%Y} - {fecha_fin:%d/%m/%Y}")
+    if ventana not in DIAS_POR_VENTANA:
+        raise BusinessException(f"Ventana de descarga no soportada: {ventana}")
+    paso = timedelta(days=DIAS_POR_VENTANA[ventana])
+    ventanas = []
+    inicio = fecha_inicio
+    while inicio <= fecha_fin:
+        fin = min(inicio + paso - timedelta(days=1), fecha_fin)
+        ventanas.append((inicio, fin))
+        inicio = fin + timedelta(days=1)
+    return ventanas
+
+def rango_configurado(cfg):
+    """
+    Retorna el rango (fecha_inicio, fecha_fin) de [recaudo] en config.ini, o None si no
+    se configuró y solo se debe descargar el día actual.
+    """
+    seccion = cfg.get("recaudo", {})
+    fecha_inicio = seccion.get("fecha_inicio", "")
+    if not fecha_inicio:
+        return None
+    fecha_fin = seccion.get("fecha_fin", "") or datetime.now().strftime("%d/%m/%Y")
+    return datetime.strptime(fecha_inicio, "%d/%m/%Y"), datetime.strptime(fecha_fin, "%d/%m/%Y")
+
+def descargar_rango(cfg, session, fecha_inicio, fecha_fin):
+    """
+    Descarga un rango de fechas en ventanas paralelas sobre la sesión autenticada.
+
+    La cantidad de descargas simultáneas se limita con [recaudo] concurrencia_max.
+    Cada ventana se guarda como recaudo_YYYYMMDD.xls y Bot 02 las une en un solo reporte.
+
+    :return: Lista de rutas descargadas, en orden de fecha.
+    """
+    seccion = cfg.get("recaudo", {})
+    ventanas = generar_ventanas(fecha_inicio, fecha_fin, seccion.get("ventana", "dia"))
+    concurrencia = max(1, min(int(seccion.get("concurrencia_max", 4)), len(ventanas)))
+    logger.info(
+        f"Descargando {len(ventanas)} ventanas entre {fecha_inicio:%d/%m/%Y} y {fecha_fin:%d/%m/%Y} "
+        f"con {concurrencia} descargas simultáneas"
+    )
+
+    # El pool de conexiones de la sesión debe admitir todas las descargas simultáneas
+    adapter = HTTPAdapter(pool_connections=concurrencia, pool_maxsize=concurrencia)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    manifiesto = cargar_manifiesto(cfg)
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        futuros = [
+            executor.submit(
+                descargar_ventana, cfg, session, inicio, fin, f"recaudo_{inicio:%Y%m%d}.xls",
+                manifiesto.get(f"{inicio:%Y%m%d}-{fin:%Y%m%d}")
+            )
+            for inicio, fin in ventanas
+        ]
+        # result() en orden de envío: conserva el orden de fechas y propaga el primer error
+        descargas = [futuro.result() for futuro in futuros]
+
+    rutas = registrar_descargas(cfg, descargas)
+    logger.info(f"Rango descargado: {len(descargas)} archivos, {vg.bytes_descargados} bytes")
+    return rutas
+
+def descargar_entradas(cfg, session):
+    """
+    Descarga el rango configurado o, si no hay rango, el recaudo del día actual.
+
+    :return: Lista de rutas descargadas.
+    """
+    rango = rango_configurado(cfg)
+    if rango:
+        return descargar_rango(cfg, session, *rango)
+    return [descargar_recaudo(cfg, session)]
 
 def bot_run(cfg, mensaje="Bot 01 - Super Admin"):
     resultado = False
@@ -65,11 +422,23 @@ def bot_run(cfg, mensaje="Bot 01 - Super Admin"):
         # Leer configuración
         config = configparser.ConfigParser()
         config.read(cfg)
-        session = super_admin_login(cfg)
-        input_path = descargar_recaudo(cfg, session)
-        if Path(input_path).exists():
+        session, reutilizada = obtener_sesion(cfg)
+        try:
+            input_paths = descargar_entradas(cfg, session)
+        except BusinessException as be:
+            # Una descarga rechazada puede deberse a una sesión vencida en el servidor
+            invalidar_sesion(cfg)
+            if not reutilizada:
+                raise
+            logger.warning(f"Descarga rechazada con la sesión guardada ({be}), se reintenta con login completo")
+            session = super_admin_login(cfg)
+            guardar_sesion(cfg, session)
+            input_paths = descargar_entradas(cfg, session)
+        vg.archivos_entrada = input_paths
+        registrar("bytes_descargados", vg.bytes_descargados)
+        if all(Path(input_path).exists() for input_path in input_paths):
             logger.info(f"Archivo recaudo descargado correctamente")
-            mensaje = f"Archivo recaudo descargado correctamente"
+            mensaje = f"Archivo recaudo descargado correctamente ({len(input_paths)} archivos)"
             resultado = True
         else:
             logger.error(f"Error al descargar el recaudo")
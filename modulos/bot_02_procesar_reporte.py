@@ -5,144 +5,280 @@ import polars as pl
 from pathlib import Path
 from datetime import datetime
 from utilidades.excepciones import BusinessException
+from utilidades.instrumentacion import registrar
+from utilidades.indice_envios import delta_activo, filtrar_delta
+from utilidades.formato_bbva import COLUMNAS_REQUERIDAS
+from utilidades.lotes import EscritorColumnar, EscritorXlsx, iterar_lotes, modo_por_lotes, tamano_lote
+from utilidades.reglas_documento import COLUMNA_VIOLACIONES, PATRON_NOMBRE_INVALIDO, ReglasDocumento
 
 logger = logging.getLogger("Bot 02 - Procesar Reporte")
 
-def procesar_df(df: pl.DataFrame) -> pl.DataFrame:
+# Nombres de columna del reporte procesado que consumen Bot 03 y Bots 04/05
+RENOMBRE_COLUMNAS = {
+    "Tipo Documento": "TipoDocumento",
+    "Numero Documento": "NumeroDocumento",
+    "Nombres": "NombreCompleto",
+    "Bin": "BIN",
+}
+
+def _registrar_violaciones(df: pl.DataFrame, reglas: ReglasDocumento):
+    """
+    Registra en el log las filas que incumple cada regla y hasta 5 ejemplos de filas rechazadas.
+    """
+    conteos = ReglasDocumento.conteos(df)
+    if not conteos:
+        logger.info("Todas las filas cumplen las reglas de validación.")
+        return
+    for regla, total in conteos.items():
+        logger.warning(f"Se encontraron {total} filas que incumplen la regla '{regla}'.")
+    rechazadas = df.filter(reglas.expr_rechazada())
+    if rechazadas.height:
+        logger.warning(f"{rechazadas.height} filas incumplen reglas de rechazo ({', '.join(reglas.rechazo)}).")
+        log_sample = rechazadas.head(5).with_columns(reglas.expr_motivos()).drop(COLUMNA_VIOLACIONES)
+        logger.warning("Ejemplos de filas rechazadas:")
+        logger.warning(log_sample.to_dict(as_series=False))
+
+def procesar_df(df: pl.DataFrame, streaming: bool = False, reglas: ReglasDocumento = None,
+                conservar_violaciones: bool = False, registrar_violaciones: bool = True) -> pl.DataFrame:
     """
     Procesa el DataFrame para limpiar y validar los datos.
+
+    Todos los pasos se encadenan en un único plan LazyFrame que se materializa con un
+    solo collect(). Con streaming=True el plan se ejecuta con el motor streaming de Polars.
+    Las reglas de validación (por defecto las de ReglasDocumento) se evalúan en el mismo
+    plan; con conservar_violaciones=True el resultado incluye la columna de violaciones
+    para separar las filas rechazadas con ReglasDocumento.separar. registrar_violaciones=False
+    omite el reporte en el log (el procesamiento por lotes lo hace una vez al final).
     """
+    reglas = reglas or ReglasDocumento()
     logger.info("Iniciando procesamiento del DataFrame.")
     
     # Renombrar columnas para facilitar el acceso
     column_names = df.columns
     logger.debug(f"Columnas originales del DataFrame: {column_names}")
-    if len(column_names) > 4:
-        # Nombres de columna deseados y sus posiciones esperadas si no existen
-        desired_columns = {
-            "Tipo Documento": 2,
-            "Numero Documento": 3,
-            "Nombres": 4
-        }
-        
-        rename_map = {}
-        current_columns = list(df.columns)
-
-        for name, index in desired_columns.items():
-            # Si el nombre deseado no está en las columnas y el índice es válido
-            if name not in current_columns and index < len(current_columns):
-                # Y el nombre actual en esa posición no es ya un nombre deseado
-                if current_columns[index] not in desired_columns:
-                    rename_map[current_columns[index]] = name
-
-        if rename_map:
-            logger.info(f"Renombrando columnas: {rename_map}")
-            df = df.rename(rename_map)
-            logger.info(f"Columnas renombradas. Nuevos nombres: {df.columns}")
-        else:
-            logger.info("No se necesitaron renombres de columnas.")
-
-        # Paso 2: Juntar columnas de nombre y apellidos en una sola columna "Nombres"
-        # NOTA: .str.strip() no existe en polars, usar solo .str.strip_chars() para limpiar espacios
-        logger.debug("Verificando si existen columnas de apellidos y nombres para unirlas.")
-        if all(col in df.columns for col in ["Apellido Paterno", "Apellido Materno", "Nombres"]):
-            logger.info("Unificando columnas 'Apellido Paterno', 'Apellido Materno' y 'Nombres' en 'Nombres'.")
-            df = df.with_columns([
-                (
-                    pl.col("Apellido Paterno").cast(pl.Utf8).str.strip_chars()
-                    + pl.lit(" ")
-                    + pl.col("Apellido Materno").cast(pl.Utf8).str.strip_chars()
-                    + pl.lit(" ")
-                    + pl.col("Nombres").cast(pl.Utf8).str.strip_chars()
-                ).str.replace_all(r"\s+", " ").str.strip_chars().alias("Nombres_Completos")
-            ])
-            # Eliminar columnas originales y dejar solo "Nombres"
-            df = df.drop(["Apellido Paterno", "Apellido Materno", "Nombres"])
-            df = df.rename({"Nombres_Completos": "Nombres"})
-            logger.info("Columnas de nombre y apellidos unidas en 'Nombres'.")
-        else:
-            logger.warning("No se encontraron todas las columnas de nombre y apellidos para unir.")
-
-        # Paso 3: Limpiar caracteres extraños en columnas relevantes
-        logger.info("Limpiando caracteres extraños y espacios en columnas relevantes.")
-        df = df.with_columns([
-            pl.col("Nombres").str.strip_chars().str.to_uppercase().str.replace_all(r"[^A-Z\sÑÁÉÍÓÚÜ]", ""),
-            pl.col("Tipo Documento").str.strip_chars().str.to_uppercase(),
-            pl.col("Numero Documento").str.strip_chars()
-        ])
-        logger.info("Columnas de texto limpiadas (espacios, caracteres extraños).")
-
-        # Paso 4: Validar longitud de Numero Documento según Tipo Documento
-        logger.info("Validando longitud de 'Numero Documento' según 'Tipo Documento'.")
-        validation_rules = {'DI': 8, 'RUC': 11, 'PT': 12, 'CE': 9}
-        expected_length = pl.col("Tipo Documento").replace(validation_rules, default=0)
-        invalid_docs = df.filter(pl.col("Numero Documento").str.len_chars() != expected_length)
-        if not invalid_docs.is_empty():
-            logger.warning(f"Se encontraron {len(invalid_docs)} filas con número de documento inválido.")
-            log_sample = invalid_docs.head(5)
-            logger.warning("Ejemplos de filas inválidas:")
-            logger.warning(log_sample.to_dict(as_series=False))
-        else:
-            logger.info("Todos los números de documento cumplen con la longitud esperada.")
-
-        # Paso 5: Si Tipo Documento in ('DI','PT','CE'), evaluar Bin in ('489486','422826','519115','483179')
-        # Se asume que existe una columna 'Bin' (si no, este paso se omite)
-        bin_values = {'489486', '422826', '519115', '483179'}
-        if "Bin" in df.columns:
-            logger.info("Validando y limpiando columna 'Bin' para tipos de documento DI, PT, CE.")
-            mask_tipo = pl.col("Tipo Documento").is_in(["DI", "PT", "CE"])
-            mask_bin = pl.col("Bin").is_in(list(bin_values))
-            # Todas las columnas ya son string, y polars no tiene .str.strip(), usar .str.strip_chars()
-            df = df.with_columns([
-                pl.when(mask_tipo & mask_bin)
-                .then(pl.col("Bin").str.strip_chars())
-                .otherwise(pl.col("Bin"))
-                .alias("Bin")
-            ])
-            logger.info("Validación y limpieza de columna 'Bin' aplicada para tipos de documento DI, PT, CE.")
-        else:
-            logger.info("Columna 'Bin' no encontrada, se omite validación de Bin.")
-
-    else:
+    if len(column_names) <= 4:
         logger.error("El archivo Excel no tiene el número de columnas esperado.")
         raise BusinessException("El archivo Excel no tiene el número de columnas esperado.")
 
-    # Limpieza de datos
-    logger.info("Realizando limpieza final de columnas de texto.")
-    df = df.with_columns([
-        pl.col("Nombres").str.strip_chars().str.to_uppercase().str.replace_all(r"[^A-Z\sÑÁÉÍÓÚÜ]", ""),
+    # Nombres de columna deseados y sus posiciones esperadas si no existen
+    desired_columns = {
+        "Tipo Documento": 2,
+        "Numero Documento": 3,
+        "Nombres": 4
+    }
+    
+    rename_map = {}
+    current_columns = list(df.columns)
+
+    for name, index in desired_columns.items():
+        # Si el nombre deseado no está en las columnas y el índice es válido
+        if name not in current_columns and index < len(current_columns):
+            # Y el nombre actual en esa posición no es ya un nombre deseado
+            if current_columns[index] not in desired_columns:
+                rename_map[current_columns[index]] = name
+
+    lf = df.lazy()
+    if rename_map:
+        logger.info(f"Renombrando columnas: {rename_map}")
+        lf = lf.rename(rename_map)
+        current_columns = [rename_map.get(col, col) for col in current_columns]
+    else:
+        logger.info("No se necesitaron renombres de columnas.")
+
+    # Paso 2: Juntar columnas de nombre y apellidos en una sola columna "Nombres"
+    logger.debug("Verificando si existen columnas de apellidos y nombres para unirlas.")
+    if all(col in current_columns for col in ["Apellido Paterno", "Apellido Materno", "Nombres"]):
+        logger.info("Unificando columnas 'Apellido Paterno', 'Apellido Materno' y 'Nombres' en 'Nombres'.")
+        lf = lf.with_columns([
+            (
+                pl.col("Apellido Paterno").cast(pl.Utf8).str.strip_chars()
+                + pl.lit(" ")
+                + pl.col("Apellido Materno").cast(pl.Utf8).str.strip_chars()
+                + pl.lit(" ")
+                + pl.col("Nombres").cast(pl.Utf8).str.strip_chars()
+            ).str.replace_all(r"\s+", " ").str.strip_chars().alias("Nombres_Completos")
+        ])
+        # Eliminar columnas originales y dejar solo "Nombres"
+        lf = lf.drop(["Apellido Paterno", "Apellido Materno", "Nombres"])
+        lf = lf.rename({"Nombres_Completos": "Nombres"})
+        current_columns = [
+            col for col in current_columns
+            if col not in ("Apellido Paterno", "Apellido Materno", "Nombres")
+        ] + ["Nombres"]
+    else:
+        logger.warning("No se encontraron todas las columnas de nombre y apellidos para unir.")
+
+    # Paso 3: Evaluar todas las reglas de validación en una sola expresión (máscara de bits).
+    # Se calcula antes de la limpieza para que la regla de nombre vea los caracteres originales.
+    lf = lf.with_columns(reglas.expr_violaciones(current_columns))
+
+    # Paso 4: Limpiar caracteres extraños en columnas relevantes (una sola vez).
+    # El strip final cubre los espacios que quedan al quitar caracteres no permitidos.
+    lf = lf.with_columns([
+        pl.col("Nombres").str.strip_chars().str.to_uppercase()
+        .str.replace_all(PATRON_NOMBRE_INVALIDO, "").str.strip_chars(),
         pl.col("Tipo Documento").str.strip_chars().str.to_uppercase(),
         pl.col("Numero Documento").cast(pl.Utf8).str.strip_chars()
     ])
-    logger.info("Columnas de texto limpiadas (espacios, caracteres extraños).")
 
-    # Validación de número de documento
-    logger.info("Validando nuevamente la longitud de 'Numero Documento' para reglas finales.")
-    validation_rules = {'DI': 8, 'RUC': 11}
-    
-    # Usando replace (antes map_dict) para la validación
-    expected_length = pl.col("Tipo Documento").replace(validation_rules, default=0)
-    
-    invalid_docs = df.filter(pl.col("Numero Documento").str.len_chars() != expected_length)
-
-    if not invalid_docs.is_empty():
-        # Log de hasta 5 filas inválidas para no sobrecargar el log
-        logger.warning(f"Se encontraron {len(invalid_docs)} filas con número de documento inválido (validación final).")
-        log_sample = invalid_docs.head(5)
-        logger.warning("Ejemplos de filas inválidas:")
-        logger.warning(log_sample.to_dict(as_series=False))
-        # Opcional: lanzar una excepción si se requiere detener el proceso
-        # raise BusinessException(f"Se encontraron {len(invalid_docs)} filas con número de documento inválido.")
+    # Paso 5: Si Tipo Documento in ('DI','PT','CE'), evaluar Bin in ('489486','422826','519115','483179')
+    # Se asume que existe una columna 'Bin' (si no, este paso se omite)
+    bin_values = {'489486', '422826', '519115', '483179'}
+    if "Bin" in current_columns:
+        logger.info("Validando y limpiando columna 'Bin' para tipos de documento DI, PT, CE.")
+        mask_tipo = pl.col("Tipo Documento").is_in(["DI", "PT", "CE"])
+        mask_bin = pl.col("Bin").is_in(list(bin_values))
+        lf = lf.with_columns([
+            pl.when(mask_tipo & mask_bin)
+            .then(pl.col("Bin").str.strip_chars())
+            .otherwise(pl.col("Bin"))
+            .alias("Bin")
+        ])
     else:
-        logger.info("Todos los números de documento cumplen con la longitud esperada (validación final).")
+        logger.info("Columna 'Bin' no encontrada, se omite validación de Bin.")
 
-    logger.info("Procesamiento del DataFrame completado.")
     # Eliminar la columna 'Fecha Activacion' si existe
-    if "Fecha Activacion" in df.columns:
+    if "Fecha Activacion" in current_columns:
         logger.info("Eliminando columna 'Fecha Activacion' del DataFrame.")
-        df = df.drop("Fecha Activacion")
-        logger.info("Columna 'Fecha Activacion' eliminada del DataFrame.")
-    return df
+        lf = lf.drop("Fecha Activacion")
+
+    # Materializar el plan completo en una sola pasada
+    df = lf.collect(engine="streaming" if streaming else "auto")
+    logger.info("Columnas de texto limpiadas (espacios, caracteres extraños).")
+
+    if registrar_violaciones:
+        _registrar_violaciones(df, reglas)
+
+    logger.info("Procesamiento del DataFrame completado.")
+    return df if conservar_violaciones else df.drop(COLUMNA_VIOLACIONES)
+
+# Motores de lectura de Excel soportados por pl.read_excel
+MOTORES_EXCEL = ("calamine", "openpyxl", "xlsx2csv")
+
+def motor_excel(cfg) -> str:
+    """
+    Retorna el motor de lectura de Excel configurado en [procesamiento] motor_excel.
+    """
+    motor = cfg.get("procesamiento", {}).get("motor_excel", "calamine").lower()
+    if motor not in MOTORES_EXCEL:
+        raise BusinessException(f"Motor de Excel no soportado: {motor}")
+    return motor
+
+def leer_recaudo(path_reporte, motor: str = "calamine") -> pl.DataFrame:
+    """
+    Lee el reporte de recaudo con el motor indicado y castea todas las columnas a string
+    (Utf8) en una sola proyección.
+    """
+    df = pl.read_excel(path_reporte, engine=motor)
+    logger.info(f"Archivo Excel leído correctamente (motor: {motor}).")
+    return df.select(pl.all().cast(pl.Utf8))
+
+# Extensión del archivo intermedio según [intermedio] formato
+SUFIJOS_INTERMEDIO = {"ipc": ".arrow", "parquet": ".parquet"}
+
+def guardar_intermedio(df: pl.DataFrame, output_path: Path, nombre_base: str, cfg):
+    """
+    Guarda el reporte procesado en formato columnar para que Bot 03 lo lea sin pasar por XLSX.
+
+    El formato se toma de [intermedio] formato en config.ini: "ipc" (Arrow IPC sin
+    compresión, legible con memory map y sin copias), "parquet" o "ninguno".
+    Retorna la ruta del archivo generado o None si el modo está deshabilitado.
+    """
+    formato = cfg.get("intermedio", {}).get("formato", "ipc").lower()
+    if formato == "ipc":
+        ruta = output_path / f"{nombre_base}{SUFIJOS_INTERMEDIO[formato]}"
+        # Sin compresión para que la lectura con memory map sea zero-copy
+        df.write_ipc(ruta, compression="uncompressed")
+    elif formato == "parquet":
+        ruta = output_path / f"{nombre_base}{SUFIJOS_INTERMEDIO[formato]}"
+        df.write_parquet(ruta)
+    elif formato == "ninguno":
+        logger.info("Archivo intermedio columnar deshabilitado en la configuración.")
+        return None
+    else:
+        raise BusinessException(f"Formato intermedio no soportado: {formato}")
+    logger.info(f"Archivo intermedio ({formato}) guardado en: {ruta}")
+    return ruta
+
+def guardar_rechazados(rechazados: pl.DataFrame, output_path: Path, nombre_base: str):
+    """
+    Guarda las filas rechazadas por validación (con sus motivos) en un CSV legible en Excel.
+    Retorna la ruta del archivo o None si no hubo rechazos.
+    """
+    if rechazados.is_empty():
+        return None
+    ruta = output_path / f"{nombre_base}.csv"
+    rechazados.write_csv(ruta, include_bom=True)
+    logger.info(f"{rechazados.height} filas rechazadas guardadas en: {ruta}")
+    return ruta
+
+def procesar_por_lotes(cfg, paths_reporte, reglas: ReglasDocumento, streaming: bool, output_path: Path, fecha_str: str):
+    """
+    Procesa el recaudo con memoria acotada: lee cada archivo en lotes de [procesamiento]
+    tamano_lote filas, aplica procesar_df a cada lote y agrega el resultado al archivo
+    intermedio, a la copia XLSX y al CSV de rechazados sin acumular el reporte completo.
+
+    Deja las rutas generadas en variables_globales y retorna la cantidad de filas escritas.
+    """
+    if delta_activo(cfg):
+        raise BusinessException("El modo delta necesita el reporte completo y no está disponible por lotes")
+    tamano = tamano_lote(cfg)
+    motor = motor_excel(cfg)
+    nombre_base = f"Reporte_Recaudacion_{fecha_str}"
+    formato = cfg.get("intermedio", {}).get("formato", "ipc").lower()
+    if formato not in SUFIJOS_INTERMEDIO and formato != "ninguno":
+        raise BusinessException(f"Formato intermedio no soportado: {formato}")
+    columnar = None
+    if formato != "ninguno":
+        columnar = EscritorColumnar(output_path / f"{nombre_base}{SUFIJOS_INTERMEDIO[formato]}", formato)
+    # El XLSX siempre se escribe: es el archivo que Bots 04/05 suben a BBVA
+    copia = EscritorXlsx(output_path / f"{nombre_base}.xlsx")
+    ruta_rechazados = output_path / f"Rechazados_{fecha_str}.csv"
+    archivo_rechazados = None
+    conteos = {}
+    filas = rechazadas = lotes = 0
+    logger.info(f"Procesamiento por lotes de {tamano} filas.")
+    try:
+        for path_reporte in paths_reporte:
+            for lote in iterar_lotes(path_reporte, tamano, motor):
+                procesado = procesar_df(lote, streaming=streaming, reglas=reglas,
+                                        conservar_violaciones=True, registrar_violaciones=False)
+                for regla, total in ReglasDocumento.conteos(procesado).items():
+                    conteos[regla] = conteos.get(regla, 0) + total
+                procesado, rechazados = reglas.separar(procesado)
+                if rechazados.height:
+                    if archivo_rechazados is None:
+                        archivo_rechazados = open(ruta_rechazados, "wb")
+                        rechazados.write_csv(archivo_rechazados, include_bom=True)
+                    else:
+                        rechazados.write_csv(archivo_rechazados, include_header=False)
+                    rechazadas += rechazados.height
+                procesado = procesado.rename(RENOMBRE_COLUMNAS)
+                if columnar:
+                    columnar.escribir(procesado)
+                copia.escribir(procesado)
+                filas += procesado.height
+                lotes += 1
+                logger.info(f"Lote {lotes} procesado ({filas} filas acumuladas).")
+    finally:
+        if archivo_rechazados:
+            archivo_rechazados.close()
+        if columnar:
+            columnar.cerrar(COLUMNAS_REQUERIDAS)
+        copia.cerrar()
+
+    for regla, total in conteos.items():
+        logger.warning(f"Se encontraron {total} filas que incumplen la regla '{regla}'.")
+    if rechazadas:
+        logger.info(f"{rechazadas} filas rechazadas guardadas en: {ruta_rechazados}")
+        if reglas.excluir_rechazados:
+            logger.warning(f"Se excluyen del envío {rechazadas} filas rechazadas por validación.")
+    registrar("rechazados", rechazadas)
+    vg.archivo_rechazados = ruta_rechazados if rechazadas else None
+    vg.archivo_intermedio = columnar.ruta if columnar else None
+    vg.archivo_recaudo = copia.ruta
+    logger.info(f"Procesamiento por lotes completado: {filas} filas en {lotes} lotes.")
+    return filas
 
 def bot_run(cfg, mensaje="Bot 02 - Procesar Reporte"):
     resultado = False
@@ -150,33 +286,47 @@ def bot_run(cfg, mensaje="Bot 02 - Procesar Reporte"):
         logger.info("Iniciando ejecución del bot_run.")      
         input_path = Path(cfg["rutas"]["ruta_input"])
         logger.debug(f"Ruta de input: {input_path}")
-        path_reporte = input_path / "recaudo.xls"
-        logger.info(f"Leyendo archivo de reporte: {path_reporte}")
-        # Leer el archivo Excel y seleccionar/renombrar las columnas relevantes
-        df = pl.read_excel(path_reporte)
-        logger.info("Archivo Excel leído correctamente.")
-        # Castear todas las columnas a string (Utf8)
-        for col in df.columns:
-            df = df.with_columns(pl.col(col).cast(pl.Utf8).alias(col))
-        logger.info(f"Reporte leído correctamente (todas las columnas casteadas a string)")
-
-        logger.info("Procesando DataFrame con la función procesar_df.")
-        df_procesado = procesar_df(df)
-
-        logger.info(f"DataFrame procesado con éxito. Shape: {df_procesado.shape}")
+        # Bot 01 deja un archivo por ventana cuando descarga un rango de fechas
+        paths_reporte = vg.archivos_entrada or [input_path / "recaudo.xls"]
+        logger.info(f"Leyendo archivos de reporte: {paths_reporte}")
+        streaming = str(cfg.get("procesamiento", {}).get("streaming", "False")).lower() == "true"
+        reglas = ReglasDocumento.desde_config(cfg)
         output_path = Path(cfg['rutas']['ruta_output'])
         logger.debug(f"Ruta de output: {output_path}")
         fecha_str = datetime.now().strftime("%Y%m%d%H%M%S")
-        nombre_archivo = f"Reporte_Recaudacion_{fecha_str}.xlsx"
-        vg.archivo_recaudo = output_path / nombre_archivo
-        logger.info(f"Guardando DataFrame procesado en: {output_path / nombre_archivo}")
-        df_procesado = df_procesado.rename({
-            "Tipo Documento": "TipoDocumento",
-            "Numero Documento": "NumeroDocumento", 
-            "Nombres": "NombreCompleto",
-            "Bin": "BIN"
-        })
-        df_procesado.write_excel((output_path / nombre_archivo))
+
+        if modo_por_lotes(cfg):
+            registrar("filas", procesar_por_lotes(cfg, paths_reporte, reglas, streaming, output_path, fecha_str))
+        else:
+            # Leer el archivo Excel y seleccionar/renombrar las columnas relevantes
+            motor = motor_excel(cfg)
+            df = pl.concat([leer_recaudo(path_reporte, motor) for path_reporte in paths_reporte], how="diagonal")
+            logger.info(f"Reporte leído correctamente (todas las columnas casteadas a string)")
+
+            logger.info("Procesando DataFrame con la función procesar_df.")
+            df_procesado = procesar_df(df, streaming=streaming, reglas=reglas, conservar_violaciones=True)
+
+            df_procesado, rechazados = reglas.separar(df_procesado)
+            vg.archivo_rechazados = guardar_rechazados(rechazados, output_path, f"Rechazados_{fecha_str}")
+            if reglas.excluir_rechazados and rechazados.height:
+                logger.warning(f"Se excluyen del envío {rechazados.height} filas rechazadas por validación.")
+            registrar("rechazados", rechazados.height)
+            if delta_activo(cfg):
+                # Solo afiliaciones nuevas o cambiadas; las claves se confirman tras la carga en BBVA
+                df_procesado, vg.envios_pendientes = filtrar_delta(df_procesado, cfg)
+                vg.sin_novedades = df_procesado.is_empty()
+
+            logger.info(f"DataFrame procesado con éxito. Shape: {df_procesado.shape}")
+            registrar("filas", df_procesado.height)
+            df_procesado = df_procesado.rename(RENOMBRE_COLUMNAS)
+            vg.archivo_intermedio = guardar_intermedio(
+                df_procesado, output_path, f"Reporte_Recaudacion_{fecha_str}", cfg
+            )
+            # El XLSX siempre se escribe: es el archivo que Bots 04/05 suben a BBVA
+            nombre_archivo = f"Reporte_Recaudacion_{fecha_str}.xlsx"
+            vg.archivo_recaudo = output_path / nombre_archivo
+            logger.info(f"Guardando DataFrame procesado en: {output_path / nombre_archivo}")
+            df_procesado.write_excel((output_path / nombre_archivo))
         mensaje = f"Reporte procesado y validado correctamente."
         resultado = True
         logger.info("Archivo procesado y guardado correctamente.")
@@ -189,4 +339,3 @@ def bot_run(cfg, mensaje="Bot 02 - Procesar Reporte"):
     finally:
         logger.info("Fin del bot: %s", mensaje)
         return resultado, mensaje
-        
\ No newline at end of file
@@ -1,14 +1,144 @@
 import logging
 import configparser
-import pandas as pd
+import polars as pl
 from pathlib import Path
 from datetime import datetime
 from utilidades.excepciones import BusinessException
+from utilidades.formato_bbva import (
+    COLUMNAS_REQUERIDAS, codificar_detalle, construir_detalle, construir_detalle_paralelo, escribir_txt,
+    escribir_txt_por_lotes, procesos_detalle,
+)
+from utilidades.lotes import iterar_lotes, modo_por_lotes, tamano_lote
 import variables_globales as vg
+from utilidades.instrumentacion import registrar
 
 logger = logging.getLogger("Bot 03 - Obtener Archivos BBVA")
 
 
+# Nombre usado en el archivo de salida por defecto para cada moneda
+NOMBRES_MONEDA = {"USD": "dolares", "PEN": "soles"}
+
+# Archivos TXT generados por defecto si config.ini no define la sección [salidas_bbva]
+SALIDAS_POR_DEFECTO = {"USD": "dolares.txt", "PEN": "soles.txt"}
+
+
+def leer_reporte(ruta_excel):
+    """
+    Lee el reporte procesado y valida que tenga las columnas requeridas.
+    Acepta el XLSX de Bot 02 o su archivo intermedio columnar (.arrow o .parquet);
+    el formato Arrow IPC se lee con memory map sin copiar los datos.
+
+    Args:
+        ruta_excel: Ruta del reporte a procesar
+
+    Returns:
+        pl.DataFrame o None si el archivo no se pudo leer o le faltan columnas
+    """
+    try:
+        sufijo = Path(ruta_excel).suffix.lower()
+        if sufijo in (".arrow", ".ipc"):
+            df = pl.read_ipc(ruta_excel, memory_map=True)
+        elif sufijo == ".parquet":
+            df = pl.read_parquet(ruta_excel, memory_map=True)
+        else:
+            df = pl.read_excel(ruta_excel)
+        logger.info(f"Reporte leído exitosamente ({sufijo}). Registros encontrados: {len(df)}")
+    except Exception as e:
+        logger.error(f"Error al leer el reporte: {e}")
+        return None
+
+    # Validar columnas requeridas
+    for col in COLUMNAS_REQUERIDAS:
+        if col not in df.columns:
+            logger.error(f"Error: Columna '{col}' no encontrada en el archivo Excel")
+            return None
+    return df
+
+
+def nombre_por_defecto(moneda, fecha_actual):
+    """Nombre del TXT de una moneda cuando la salida no se indica."""
+    moneda_nombre = NOMBRES_MONEDA.get(moneda, moneda.lower())
+    return f"RECAUDO_12159_{fecha_actual}_01_{moneda_nombre}.TXT"
+
+
+def generar_txt_monedas(salidas, ruta_excel, procesos=1):
+    """
+    Genera un archivo TXT por moneda leyendo el reporte y armando el detalle una sola vez.
+    Solo la cabecera (01) cambia entre monedas, el bloque de detalle (02) se reutiliza.
+
+    Args:
+        salidas: Diccionario moneda -> ruta del TXT de salida (None usa el nombre por defecto)
+        ruta_excel: Ruta del archivo Excel a procesar
+        procesos: Procesos para formatear el detalle (1 = serial)
+
+    Returns:
+        dict: Moneda -> ruta del archivo generado (vacío si no se pudo leer el reporte)
+    """
+    df = leer_reporte(ruta_excel)
+    if df is None:
+        return {}
+
+    # Construir todas las líneas de detalle (02) en una sola pasada columnar
+    detalle = construir_detalle_paralelo(df, procesos) if procesos > 1 else construir_detalle(df)
+    # Codificado una sola vez: todas las monedas comparten los mismos bytes de detalle
+    detalle = codificar_detalle(detalle)
+    fecha_actual = datetime.now().strftime("%Y%m%d")
+
+    generados = {}
+    for moneda, archivo_salida in salidas.items():
+        # Generar nombre de archivo de salida si no se proporciona
+        if archivo_salida is None:
+            archivo_salida = nombre_por_defecto(moneda, fecha_actual)
+
+        # Cabecera (01) y total (03) por moneda; el detalle ya codificado es el mismo buffer para todas
+        escribir_txt(archivo_salida, moneda, detalle, len(df), fecha_actual)
+        generados[moneda] = archivo_salida
+
+        logger.info(f"Archivo TXT generado exitosamente: {archivo_salida}")
+        logger.info(f"Moneda utilizada: {moneda}")
+
+    logger.info(f"Total de registros procesados: {len(df)}")
+    registrar("filas", len(df))
+    return generados
+
+
+def generar_txt_monedas_por_lotes(salidas, ruta_reporte, tamano):
+    """
+    Igual que generar_txt_monedas, pero lee el reporte en lotes de `tamano` filas y escribe
+    el detalle de cada lote en todos los TXT a medida que se genera, con memoria acotada.
+
+    Args:
+        salidas: Diccionario moneda -> ruta del TXT de salida (None usa el nombre por defecto)
+        ruta_reporte: Archivo intermedio (.arrow/.parquet) o XLSX de Bot 02
+        tamano: Filas por lote
+
+    Returns:
+        dict: Moneda -> ruta del archivo generado (vacío si no se pudo leer el reporte)
+    """
+    fecha_actual = datetime.now().strftime("%Y%m%d")
+    generados = {
+        moneda: archivo_salida or nombre_por_defecto(moneda, fecha_actual)
+        for moneda, archivo_salida in salidas.items()
+    }
+
+    def detalles():
+        for lote in iterar_lotes(ruta_reporte, tamano):
+            faltantes = [col for col in COLUMNAS_REQUERIDAS if col not in lote.columns]
+            if faltantes:
+                raise BusinessException(f"Columnas {faltantes} no encontradas en el reporte {ruta_reporte}")
+            yield construir_detalle(lote), lote.height
+
+    try:
+        total = escribir_txt_por_lotes(generados, detalles(), fecha_actual)
+    except BusinessException as be:
+        logger.error(f"Error al leer el reporte: {be}")
+        return {}
+
+    logger.info(f"Total de registros procesados: {total}")
+    registrar("filas", total)
+    return generados
+
+
 def convertir_excel_a_txt(archivo_salida, moneda, ruta_excel):
     """
     Convierte un archivo Excel con datos de usuarios al formato TXT requerido
@@ -18,119 +148,15 @@ def convertir_excel_a_txt(archivo_salida, moneda, ruta_excel):
         moneda: Moneda a usar en el archivo ("USD" para dólares, "PEN" para soles)
         ruta_excel: Ruta del archivo Excel a procesar
     """
+    return generar_txt_monedas({moneda: archivo_salida}, ruta_excel).get(moneda)
 
-    # Leer el archivo Excel
-    try:
-        df = pd.read_excel(ruta_excel)
-        print(f"Archivo Excel leído exitosamente. Registros encontrados: {len(df)}")
-    except Exception as e:
-        print(f"Error al leer el archivo Excel: {e}")
-        return
-
-    # Validar columnas requeridas
-    columnas_requeridas = ['TipoDocumento', 'NumeroDocumento', 'NombreCompleto', 'BIN']
-    for col in columnas_requeridas:
-        if col not in df.columns:
-            print(f"Error: Columna '{col}' no encontrada en el archivo Excel")
-            return
-
-    # Generar nombre de archivo de salida si no se proporciona
-    if archivo_salida is None:
-        fecha_actual = datetime.now().strftime("%Y%m%d")
-        moneda_nombre = "dolares" if moneda == "USD" else "soles"
-        archivo_salida = f"RECAUDO_12159_{fecha_actual}_01_{moneda_nombre}.TXT"
-
-    # Función para formatear nombre (máximo 30 caracteres)
-    def formatear_nombre_largo(nombre, longitud=30):
-        nombre = str(nombre).upper().strip()
-        if len(nombre) > longitud:
-            nombre = nombre[:longitud]
-        return nombre.ljust(longitud)
-
-    # Función para formatear nombre corto (máximo 28 caracteres)
-    def formatear_nombre_corto(nombre, longitud=28):
-        nombre = str(nombre).upper().strip()
-        if len(nombre) > longitud:
-            nombre = nombre[:longitud]
-        return nombre.ljust(longitud)
-
-    # Función para formatear documento (8 caracteres)
-    def formatear_documento(doc):
-        doc = str(doc).strip()
-        return doc.ljust(8)
-
-    # Crear el archivo TXT
-    with open(archivo_salida, 'w', encoding='utf-8') as archivo:
-
-        # LÍNEA HEADER (01)
-        # Formato: 01 + info del archivo + padding hasta 360 caracteres
-        bin_value = str(df.iloc[0]['BIN']) if 'BIN' in df.columns and not pd.isna(df.iloc[0]['BIN']) else "489000"
-        fecha_proceso = datetime.now().strftime("%Y%m%d")  # Fecha actual YYYYMMDD
-
-        header = "01"  # Tipo de registro
-        header += "20537140489"  # RUC EMPRESA (código fijo)
-        header += "000"  # NRO CLASE (siempre 000)
-        header += moneda  # Moneda (USD o PEN)
-        header += fecha_proceso  # Fecha actual
-        header += "011"  # Versión (siempre 011)
-        header += " " * 7  # Espacios
-        header += "P"  # Tipo de proceso
-
-        # Rellenar con espacios hasta 360 caracteres
-        header = header.ljust(360)
-        archivo.write(header + '\n')
-
-        # LÍNEAS DE DETALLE (02)
-        for index, row in df.iterrows():
-            linea = "02"  # Tipo de registro
-
-            # Nombre completo (30 caracteres)
-            nombre_largo = formatear_nombre_largo(row['NombreCompleto'], 30)
-            linea += nombre_largo
-
-            # Número de documento (8 caracteres)
-            documento = formatear_documento(row['NumeroDocumento'])
-            linea += documento
-
-            # Espacios de relleno (12 caracteres)
-            linea += " " * 12
-
-            # Nombre corto (28 caracteres) - versión truncada del nombre
-            nombre_corto = formatear_nombre_corto(row['NombreCompleto'], 28)
-            linea += nombre_corto
-
-            # Fecha de inicio (8 caracteres) - formato YYYYMMDD
-            fecha_inicio = "20391231"  # Fecha fija como en el ejemplo
-            linea += fecha_inicio
-
-            # Fecha de fin (8 caracteres) - formato YYYYMMDD  
-            fecha_fin = "20391231"  # Fecha fija como en el ejemplo
-            linea += fecha_fin
-
-            # Rellenar con espacios hasta 360 caracteres
-            linea = linea.ljust(360)
-            archivo.write(linea + '\n')
-
-        # LÍNEA DE TOTAL (03)
-        total_registros = str(len(df)).zfill(9)  # 9 dígitos con ceros a la izquierda
-        linea_total = "03"  # Tipo de registro
-        linea_total += "000000"  # Ceros de relleno
-        linea_total += total_registros  # Total de registros
-        linea_total += "0" * 52  # Ceros de relleno adicional
-
-        # Rellenar con espacios hasta 360 caracteres
-        linea_total = linea_total.ljust(360)
-        archivo.write(linea_total + '\n')
-
-    print(f"Archivo TXT generado exitosamente: {archivo_salida}")
-    print(f"Total de registros procesados: {len(df)}")
-    print(f"Moneda utilizada: {moneda}")
 
 # Función para generar TXT en dólares
 def generar_txt_dolares(archivo_salida, ruta_excel):
     """Genera archivo TXT con moneda en dólares (USD)"""
     return convertir_excel_a_txt(archivo_salida, "USD", ruta_excel)
 
+
 # Función para generar TXT en soles
 def generar_txt_soles(archivo_salida, ruta_excel):
     """Genera archivo TXT con moneda en soles (PEN)"""
@@ -142,11 +168,21 @@ def bot_run(cfg, mensaje="Bot 03 - Obtener Archivos BBVA"):
     try:
         logger.info("Iniciando ejecución del bot_run.")      
         input_path = Path(cfg["rutas"]["ruta_input"])
-        logger.debug(f"Ruta de input: {vg.archivo_recaudo}")
-        logger.info(f"Leyendo archivo de reporte: {vg.archivo_recaudo}")
-        generar_txt_dolares(cfg["rutas"]["ruta_output"] + "/dolares.txt", vg.archivo_recaudo)
-        generar_txt_soles(cfg["rutas"]["ruta_output"] + "/soles.txt", vg.archivo_recaudo)
-        # Leer el archivo Excel y seleccionar/renombrar las columnas relevantes
+        # Preferir el archivo intermedio columnar de Bot 02 frente al XLSX
+        ruta_reporte = vg.archivo_intermedio or vg.archivo_recaudo
+        logger.debug(f"Ruta de input: {ruta_reporte}")
+        logger.info(f"Leyendo archivo de reporte: {ruta_reporte}")
+        # Un solo TXT por moneda configurada, leyendo el reporte una única vez
+        salidas = {
+            moneda: str(Path(cfg["rutas"]["ruta_output"]) / nombre)
+            for moneda, nombre in cfg.get("salidas_bbva", SALIDAS_POR_DEFECTO).items()
+        }
+        if modo_por_lotes(cfg):
+            vg.archivos_txt = generar_txt_monedas_por_lotes(salidas, ruta_reporte, tamano_lote(cfg))
+        else:
+            vg.archivos_txt = generar_txt_monedas(salidas, ruta_reporte, procesos_detalle(cfg))
+        if not vg.archivos_txt:
+            raise BusinessException(f"No se pudieron generar los archivos TXT desde {ruta_reporte}")
         mensaje = f"Reporte procesado y validado correctamente."
         resultado = True
         logger.info("Archivo procesado y guardado correctamente.")
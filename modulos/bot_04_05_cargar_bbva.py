@@ -0,0 +1,136 @@
+import time
+import logging
+from contextlib import ExitStack
+import os
+import variables_globales as vg
+from utilidades.bbva_netcash import navegador_netcash, login, select_charges, upload_file
+from utilidades.esperas import EsperaAdaptativa
+from utilidades.indice_envios import confirmar_carga
+from utilidades.instrumentacion import incrementar
+from utilidades.shadow_dom import ResolutorShadow
+
+logger = logging.getLogger("Bot 04/05 - Cargar BBVA Soles y Dólares")
+
+# Monedas a cargar en la misma sesión, en orden (texto del radio button en Netcash)
+MONEDAS_CARGA = ["SOLES", "DOLARES"]
+
+
+def cargar_bbva_monedas_navegacion(cfg, monedas):
+    """
+    Ejecuta la carga de varias monedas en una sola sesión de navegador: un solo inicio de
+    Chrome y un solo login, repitiendo solo la selección de cobros y la carga por moneda.
+
+    :return: Diccionario moneda -> True/False según el resultado de la carga.
+    """
+    navegador = ExitStack()
+    espera = None
+    resultados = {moneda: False for moneda in monedas}
+    try:
+        logger.info(f"Iniciando proceso de navegación Cargar BBVA para {', '.join(monedas)}")
+        # Driver del pool de navegadores pre-lanzados; se devuelve limpio al cerrar la pila
+        driver = navegador.enter_context(navegador_netcash(cfg))
+        espera = EsperaAdaptativa(driver, cfg)
+        # Un solo resolutor para ambas monedas: reutiliza los elementos ya resueltos
+        resolutor = ResolutorShadow(driver)
+
+        max_attempts = int(cfg['reintentos']['reintentos_max'])
+        for attempt in range(max_attempts):
+            try:
+                logger.info(f"Intento de login {attempt + 1}/{max_attempts}")
+                login(driver, cfg, espera)
+                logger.info("Login exitoso")
+                break
+            except Exception as e:
+                logger.warning(f"Error en intento {attempt + 1}: {e}")
+                if attempt < max_attempts - 1:
+                    logger.info("Actualizando página y reintentando login...")
+                    driver.refresh()
+                    incrementar("reintentos")
+                    time.sleep(5)
+                else:
+                    logger.error("Se agotaron todos los intentos de login")
+                    raise e
+
+        for moneda in monedas:
+            # Reintentar desde selección de cobros si hay problemas
+            for flow_attempt in range(max_attempts):
+                try:
+                    logger.info(f"[{moneda}] Intento de flujo desde cobros {flow_attempt + 1}/{max_attempts}")
+                    # Volver al contexto principal antes de cada flujo (también tras la carga anterior)
+                    resolutor.contenido_principal()
+                    select_charges(driver, espera, resolutor)
+                    resultados[moneda] = upload_file(driver, moneda, espera=espera, resolutor=resolutor)
+                    if resultados[moneda]:
+                        logger.info(f"[{moneda}] Carga realizada correctamente")
+                        break
+                    logger.warning(f"[{moneda}] BBVA rechazó la carga en el intento {flow_attempt + 1}")
+                except Exception as e:
+                    logger.warning(f"[{moneda}] Error en flujo intento {flow_attempt + 1}: {e}")
+                if flow_attempt < max_attempts - 1:
+                    logger.info(f"[{moneda}] Reiniciando desde selección de cobros...")
+                    incrementar("reintentos")
+                    time.sleep(3)
+                else:
+                    logger.error(f"[{moneda}] Se agotaron todos los intentos de flujo")
+            if resultados[moneda] and os.path.exists(vg.archivo_recaudo):
+                incrementar("bytes_subidos", os.path.getsize(vg.archivo_recaudo))
+            if resultados[moneda]:
+                confirmar_carga(cfg, moneda)
+                # Registro por moneda para que --resume no vuelva a subir una moneda ya aceptada
+                vg.monedas_cargadas.append(moneda)
+
+        return resultados
+    except Exception as e:
+        logger.error(f"Ocurrió un error en cargar_bbva_monedas_navegacion: {e}")
+        return resultados
+    finally:
+        if espera:
+            espera.resumen()
+            logger.info(f"Resolución de rutas shadow DOM: {resolutor.llamadas} llamadas a execute_script")
+        navegador.close()
+
+
+def bot_run(cfg, mensaje, monedas=None):
+    """
+    :param monedas: Monedas a cargar. Por defecto, las de MONEDAS_CARGA que aún no están en
+                    vg.monedas_cargadas (restauradas del manifiesto al reanudar).
+    """
+    logger.info("Iniciando ejecución de bot_run para Cargar BBVA Soles y Dólares.")
+    try:
+        resultado = False
+        if monedas is None:
+            monedas = [moneda for moneda in MONEDAS_CARGA if moneda not in vg.monedas_cargadas]
+        pendientes = list(monedas)
+        if vg.monedas_cargadas:
+            logger.info(f"Monedas ya cargadas en la ejecución anterior: {', '.join(vg.monedas_cargadas)}")
+        if not pendientes:
+            resultado = True
+
+        max_attempts = 3 if pendientes else 0
+        for attempt in range(max_attempts):
+            logger.info(f"Intento de navegación {attempt + 1}/{max_attempts} para {', '.join(pendientes)}")
+            resultados = cargar_bbva_monedas_navegacion(cfg, pendientes)
+            # Solo se reintentan las monedas que no se cargaron
+            pendientes = [moneda for moneda in pendientes if not resultados.get(moneda)]
+            if not pendientes:
+                resultado = True
+                break
+            logger.warning(f"Navegación fallida en intento {attempt + 1} para {', '.join(pendientes)}")
+            if attempt < max_attempts - 1:
+                incrementar("reintentos")
+                time.sleep(5)  # Esperar 5 segundos antes del siguiente intento
+
+        if resultado:
+            mensaje = "Carga exitosa de soles y dólares en una sola sesión"
+        else:
+            mensaje = f"Carga no exitosa para: {', '.join(pendientes)}"
+
+    except Exception as e:
+        logger.error(f"Error en bot Cargar BBVA Soles y Dólares: {e}")
+        # Sin taskkill/pkill de Chrome: Bot 04 y Bot 05 pueden correr a la vez y el driver de
+        # este bot ya se liberó en navegador_netcash (devuelto al pool o cerrado)
+        raise Exception(f"Error en bot Cargar BBVA Soles y Dólares: {e}") from e
+
+    finally:
+        logger.info("Navegador cerrado")
+        return resultado, mensaje
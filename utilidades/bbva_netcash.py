@@ -0,0 +1,345 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium_stealth import stealth
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+import variables_globales as vg 
+from utilidades.excepciones import BusinessException
+from utilidades.chromedriver_cache import obtener_chromedriver
+from utilidades.perfil_ligero import aplicar_opciones, activar_bloqueo, medir_red
+from utilidades.selenium import SeleniumPool
+from utilidades.esperas import (
+    EsperaAdaptativa, alerta_presente, elemento_clickeable, elemento_obsoleto,
+    elemento_presente, pagina_estable
+)
+from utilidades.shadow_dom import ResolutorShadow
+
+logger = logging.getLogger("Utils - BBVA Netcash")
+
+# Rutas de navegación en Netcash (">>>" = salto a shadowRoot, ver utilidades/shadow_dom.py)
+RUTA_MENU_COBROS = "bbva-btge-sidebar-menu >>> bbva-web-navigation-menu-item[icon='bbva:paysheetdollar']"
+RUTA_IFRAME_LANDING = "bbva-btge-menurization-landing-solution-page >>> bbva-core-iframe >>> iframe"
+RUTA_ENLACES_LANDING = "bbva-btge-menurization-landing-solution-home-page >>> bbva-web-link"
+RUTA_IFRAME_LEGACY = "legacy-page >>> bbva-core-iframe >>> iframe"
+RUTA_IFRAME_CARGA = "iframe#kyop-central-load-area"
+
+#Función para imprimir la información de un elemento de html
+def print_element_info(elemento):
+    logger.debug("Ejecutando print_element_info")
+    children = elemento.find_elements(By.CSS_SELECTOR, "*")
+    # Imprimir tag y clase
+    for child in children:
+        print(child.tag_name, "-", child.get_attribute("class"))
+
+def create_stealth_webdriver(cfg):
+    logger.info("Creando instancia de Chrome WebDriver con stealth.")
+    """
+    Crea un driver de Chrome configurado para descargar archivos en la ruta indicada en cfg['rutas']['ruta_input']
+    """
+    download_path = str(Path(cfg['rutas']['ruta_input']).absolute())
+    profile_dir = str(Path(cfg['rutas']['ruta_perfil_bbva_soles']).absolute())
+    options = webdriver.ChromeOptions()
+    # options.add_argument(f"user-data-dir={profile_dir}")
+    
+    # Argumentos anti-detección mejorados
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-browser-side-navigation")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-first-run")
+    options.add_argument("--no-service-autorun")
+    options.add_argument("--password-store=basic")
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--start-maximized")
+    
+    # User agent más actualizado
+    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36')
+
+    prefs = {
+        "download.default_directory": download_path,
+        "credentials_enable_service": False,
+        "profile.password_manager_enabled": False,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_settings.popups": 0,
+        "profile.managed_default_content_settings.images": 1,
+        "profile.default_content_setting_values.cookies": 1,
+        "profile.block_third_party_cookies": False,
+        "profile.default_content_setting_values.plugins": 1,
+        "profile.content_settings.plugin_whitelist.adobe-flash-player": 1,
+        "profile.content_settings.exceptions.plugins.*,*.per_resource.adobe-flash-player": 1
+    }
+    # Perfil ligero ([navegador] en config.ini): sin imágenes ni plugins, log de red opcional
+    aplicar_opciones(options, prefs, cfg)
+    options.add_experimental_option("prefs", prefs)
+
+    # Set longer timeout for ChromeDriver installation
+    os.environ['PYDEVD_WARN_EVALUATION_TIMEOUT'] = '30'  # 30 seconds timeout
+    os.environ['PYDEVD_UNBLOCK_THREADS_TIMEOUT'] = '30'  # Unblock threads after 30 seconds
+    logger.info("Resolviendo ChromeDriver desde la cache y lanzando navegador.")
+    driver = webdriver.Chrome(service=Service(obtener_chromedriver(cfg)), options=options)
+
+    # Ejecutar scripts anti-detección adicionales
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    driver.execute_script("Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]})")
+    driver.execute_script("Object.defineProperty(navigator, 'languages', {get: () => ['es-ES', 'es']})")
+    driver.execute_script("window.chrome = {runtime: {}}")
+
+    stealth(driver,
+        languages=["es-ES", "es"],
+        vendor="Google Inc.",
+        platform="Win32",
+        webgl_vendor="Intel Inc.",
+        renderer="Intel Iris OpenGL Engine",
+        fix_hairline=True,
+    )
+
+    activar_bloqueo(driver, cfg)
+
+    logger.info("WebDriver creado y configurado con stealth.")
+    return driver
+
+# Pool de navegadores compartido por Bots 04/05 durante la ejecución (ver navegador_netcash)
+_pool_navegadores = None
+_lock_pool = threading.Lock()
+
+def pool_navegadores(cfg):
+    """
+    Retorna el pool de drivers de Netcash, creándolo (y pre-lanzando sus navegadores en
+    paralelo) la primera vez. None si [selenium_pool] tamano es 0.
+    """
+    global _pool_navegadores
+    tamano = int(cfg.get("selenium_pool", {}).get("tamano", 2))
+    if tamano <= 0:
+        return None
+    with _lock_pool:
+        if _pool_navegadores is None:
+            # Con carga combinada solo corre un bot de carga a la vez
+            combinada = str(cfg.get("bbva", {}).get("carga_combinada", "False")).lower() == "true"
+            _pool_navegadores = SeleniumPool(
+                lambda indice: create_stealth_webdriver(cfg), tamano=min(tamano, 1 if combinada else 2), cfg=cfg
+            )
+        return _pool_navegadores
+
+def cerrar_pool_navegadores():
+    """Cierra los navegadores del pool al terminar la ejecución."""
+    global _pool_navegadores
+    with _lock_pool:
+        pool, _pool_navegadores = _pool_navegadores, None
+    if pool:
+        pool.cerrar()
+
+@contextmanager
+def _driver_dedicado(cfg):
+    driver = create_stealth_webdriver(cfg)
+    try:
+        yield driver
+    finally:
+        try:
+            driver.quit()
+            logger.info("Driver cerrado correctamente")
+        except Exception:
+            logger.warning("Error al cerrar el driver")
+
+@contextmanager
+def navegador_netcash(cfg):
+    """
+    Driver para una sesión de Netcash: tomado del pool de navegadores pre-lanzados (y
+    devuelto limpio al salir) o, sin pool, uno nuevo que se cierra al salir. El tráfico de
+    red se mide antes de liberar el driver.
+    """
+    pool = pool_navegadores(cfg)
+    with (pool.obtener() if pool else _driver_dedicado(cfg)) as driver:
+        try:
+            yield driver
+        finally:
+            try:
+                medir_red(driver, cfg)
+            except Exception as e:
+                logger.warning(f"No se pudo medir el tráfico de red: {e}")
+
+def login(driver, cfg, espera=None):
+    """
+    Realiza el proceso de login en BBVA Netcash. Si falla, lanza una excepción.
+    """
+    espera = espera or EsperaAdaptativa(driver, cfg)
+    try:
+        logger.info("Iniciando login BBVA Netcash")
+
+        # Limpiar cookies y storage
+        driver.delete_all_cookies()
+        driver.get(cfg['url']['url_bbva'])
+        driver.execute_script("window.localStorage.clear();")
+        driver.execute_script("window.sessionStorage.clear();")
+
+        # Ingresar código de empresa - esperar que esté presente y sea clickeable
+        company_code_input = espera.esperar(
+            "login_codigo_empresa", elemento_clickeable((By.XPATH, "//input[@name='cod_emp']")), 20
+        )
+        company_code_input.clear()
+        company_code_input.send_keys(cfg['env_vars']['bbva']['code'])
+
+        # Ingresar código de usuario - esperar que esté presente y sea clickeable
+        user_code_input = espera.esperar(
+            "login_codigo_usuario", elemento_clickeable((By.XPATH, "//input[@name='cod_usu']")), 15
+        )
+        user_code_input.clear()
+        user_code_input.send_keys(cfg['env_vars']['bbva']['user'])
+
+        # Ingresar contraseña - esperar que esté presente y sea clickeable
+        password_input = espera.esperar(
+            "login_password", elemento_clickeable((By.XPATH, "//input[@name='eai_password']")), 15
+        )
+        password_input.clear()
+        password_input.send_keys(cfg['env_vars']['bbva']['password'])
+
+        # Click en Ingresar - esperar que el botón esté clickeable
+        login_button = espera.esperar(
+            "login_boton_ingresar", elemento_clickeable((By.XPATH, "//button[text()='Ingresar']")), 15
+        )
+        driver.execute_script("arguments[0].click();", login_button)
+
+        # Esperar la navegación posterior al login y que la página termine de cargar
+        espera.esperar("login_navegacion", elemento_obsoleto(login_button), 10, obligatorio=False)
+        espera.esperar("login_carga_portal", pagina_estable(), 15, obligatorio=False)
+
+        # Refrescar después del login
+        driver.refresh()
+        espera.esperar("login_refresco", pagina_estable(), 10, obligatorio=False)
+
+        logger.info("Login exitoso en BBVA Netcash")
+
+    except Exception as e:
+        logger.error(f"Error durante el login BBVA Netcash: {e}")
+        raise e
+
+def select_charges(driver, espera=None, resolutor=None):
+    logger.info("Seleccionando menú de cobros en la interfaz BBVA.")
+    espera = espera or EsperaAdaptativa(driver)
+    resolutor = resolutor or ResolutorShadow(driver)
+    # El menú lateral no se recarga entre monedas: se reutiliza el elemento en cache
+    espera.esperar("menu_cobros", resolutor.condicion(RUTA_MENU_COBROS, usar_cache=True), 20)
+    resolutor.ejecutar(RUTA_MENU_COBROS, lambda elemento: elemento.click())
+    espera.esperar("landing_cobros", resolutor.condicion(RUTA_IFRAME_LANDING), 15)
+    logger.info("Menú de cobros seleccionado.")
+
+def upload_file(driver, moneda="SOLES", ruta_archivo=None, espera=None, resolutor=None):
+    """
+    Carga el archivo de recaudo en BBVA Netcash para la moneda indicada.
+
+    :param moneda: Texto del radio button de la moneda ("SOLES" o "DOLARES").
+    :param ruta_archivo: Archivo a cargar (por defecto vg.archivo_recaudo).
+    :param espera: EsperaAdaptativa compartida para registrar los tiempos de cada paso.
+    :param resolutor: ResolutorShadow compartido (reutiliza su cache entre monedas).
+    :return: True si la carga fue aceptada, False si BBVA rechazó la estructura.
+    """
+    if ruta_archivo is None:
+        ruta_archivo = vg.archivo_recaudo
+    # Se valida antes de tocar la página: una ruta vacía llegaría tal cual al input de archivo
+    if not ruta_archivo or not Path(ruta_archivo).is_file():
+        raise BusinessException(f"No existe el archivo a cargar en BBVA: '{ruta_archivo}'")
+    espera = espera or EsperaAdaptativa(driver)
+    resolutor = resolutor or ResolutorShadow(driver)
+    logger.info("Entrando al iframe principal.")
+    resolutor.entrar(RUTA_IFRAME_LANDING, espera, "iframe_landing", 15)
+    logger.info("Se ha entrado al iframe correctamente.")
+
+    # El enlace se busca por texto dentro del mismo script que atraviesa el shadowRoot
+    link_element = espera.esperar(
+        "landing_enlaces", resolutor.condicion(RUTA_ENLACES_LANDING, texto="Cargar archivo"), 15
+    )
+    logger.info("Encontrado enlace 'Cargar archivo', haciendo clic.")
+    link_element.click()
+
+    resolutor.contenido_principal()
+    resolutor.entrar(RUTA_IFRAME_LEGACY, espera, "iframe_bbva", 20)
+    logger.debug("Dentro del iframe #bbvaIframe.")
+
+    resolutor.entrar(RUTA_IFRAME_CARGA, espera, "iframe_kyop", 15)
+    logger.debug("Dentro del iframe #kyop-central-load-area.")
+
+    # Esperar hasta que el radio button de la moneda esté presente y hacerle click
+    logger.info(f"Esperando el radio button de {moneda} y haciendo click...")
+    radio_moneda = espera.esperar(
+        "radio_moneda",
+        elemento_presente(
+            (By.XPATH, f"//input[@type='radio' and @class='botonradio' and contains(@onclick, '{moneda}')]")
+        ),
+        60,
+    )
+    driver.execute_script("arguments[0].click();", radio_moneda)
+    logger.info(f"Click en el radio button de {moneda} realizado correctamente.")
+    # Esperar hasta que el botón 'Continuar' esté presente y hacerle clic
+    logger.info("Esperando el botón 'Continuar' y haciendo click...")
+    boton_continuar = espera.esperar(
+        "boton_continuar",
+        elemento_clickeable((By.XPATH, "//input[@type='button' and @value='Continuar']")),
+        30,
+    )
+    driver.execute_script("arguments[0].click();", boton_continuar)
+    logger.info("Click en el botón 'Continuar' realizado correctamente.")
+    # Esperar hasta que el radio button de "incorpor" esté presente y hacerle click
+    logger.info("Esperando el radio button de 'incorpor' y haciendo click...")
+    radio_incorpor = espera.esperar(
+        "radio_incorpor",
+        elemento_presente((By.XPATH, "//input[@type='radio' and contains(@onclick, 'incorpor')]")),
+        30,
+    )
+    driver.execute_script("arguments[0].click();", radio_incorpor)
+    logger.info("Click en el radio button de 'incorpor' realizado correctamente.")
+
+    # Usar JavaScript para establecer el valor del input file (no siempre funciona por restricciones de seguridad del navegador)
+    # Se asume que ruta_archivo es una variable con la ruta absoluta al archivo a subir
+    file_input = espera.esperar(
+        "input_archivo",
+        elemento_presente((By.XPATH, "//input[@type='file' and @name='ficheroIncorpora']")),
+        30,
+    )
+        
+    # Hacer visible el input si está oculto
+    driver.execute_script("arguments[0].style.display = 'block';", file_input)
+        
+    # Enviar la ruta del archivo
+    file_input.send_keys(str(ruta_archivo))
+        
+    logger.info(f"Archivo {ruta_archivo} cargado exitosamente")
+
+    # Esperar hasta que el botón 'Continuar' con id 'btnEnviar' esté presente y hacerle clic
+    logger.info("Esperando el botón 'Continuar' y haciendo click...")
+    boton_enviar = espera.esperar(
+        "boton_enviar",
+        elemento_clickeable((By.XPATH, "//input[@type='button' and @id='btnEnviar' and @value='Continuar']")),
+        30,
+    )
+    driver.execute_script("arguments[0].click();", boton_enviar)
+    logger.info("Click en el botón 'Continuar' realizado correctamente.")
+
+    alert = espera.esperar("alerta_confirmacion", alerta_presente(), 10)
+    logger.info(f"Confirmando: {alert.text}")
+    alert.accept()  # Hace clic en "Aceptar"
+    logger.info("Carga de archivo confirmada")
+    espera.esperar("carga_resultado", pagina_estable(), 10, obligatorio=False)
+
+    # Verificar si aparece el mensaje de error por estructura incorrecta del archivo txt
+    mensaje_error = espera.esperar(
+        "verificar_error_carga",
+        elemento_presente((By.XPATH, "//div[@class='msj_ico msj_err']")),
+        5,
+        obligatorio=False,
+    )
+
+    if mensaje_error:
+        logger.error("La estructura del archivo txt no es correcta. Abortando proceso de carga.")
+        return False
+    else:
+        logger.info("La estructura del archivo txt es correcta. Se realizó proceso de carga.")
+        return True
@@ -0,0 +1,213 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import stat
+import subprocess
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+logger = logging.getLogger("Utils - ChromeDriver Cache")
+
+# Carpeta (dentro de ruta_estado) donde se guardan los drivers por versión de Chrome
+CARPETA_DRIVERS = "drivers"
+INDICE_DRIVERS = "indice.json"
+RUTA_ESTADO_POR_DEFECTO = "./cliente/estado"
+
+# Ejecutables de Chrome a consultar en Linux/Mac (CHROME_BIN tiene prioridad, ver dockerfile)
+BINARIOS_CHROME = ("google-chrome-stable", "google-chrome", "chromium", "chromium-browser")
+CLAVES_REGISTRO_CHROME = (
+    r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon",
+    r"HKEY_LOCAL_MACHINE\Software\Google\Chrome\BLBeacon",
+)
+PATRON_VERSION = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+
+# Ruta resuelta por proceso: evita consultar la versión de Chrome en cada lanzamiento
+_resuelto = {}
+# Serializa la resolución cuando varios bots lanzan Chrome en paralelo (una sola descarga)
+_lock = threading.Lock()
+
+
+def _config_chromedriver(cfg):
+    return dict(cfg.get("chromedriver", {})) if cfg else {}
+
+
+def es_offline(cfg=None) -> bool:
+    """Modo offline: [chromedriver] offline = True o variable de entorno CHROMEDRIVER_OFFLINE=1."""
+    if os.environ.get("CHROMEDRIVER_OFFLINE", "").lower() in ("1", "true"):
+        return True
+    return str(_config_chromedriver(cfg).get("offline", "False")).lower() == "true"
+
+
+def carpeta_cache(cfg=None) -> Path:
+    ruta_estado = cfg["rutas"].get("ruta_estado", RUTA_ESTADO_POR_DEFECTO) if cfg else RUTA_ESTADO_POR_DEFECTO
+    return Path(ruta_estado) / CARPETA_DRIVERS
+
+
+@lru_cache(maxsize=1)
+def version_chrome():
+    """
+    Retorna la versión instalada de Chrome (ej. "131.0.6778.85") o None si no se pudo detectar.
+    Se detecta una sola vez por proceso: cada lanzamiento de driver la consulta.
+    """
+    if platform.system() == "Windows":
+        for clave in CLAVES_REGISTRO_CHROME:
+            salida = _ejecutar(["reg", "query", clave, "/v", "version"])
+            coincidencia = PATRON_VERSION.search(salida or "")
+            if coincidencia:
+                return coincidencia.group(0)
+        return None
+
+    binarios = [os.environ["CHROME_BIN"]] if os.environ.get("CHROME_BIN") else []
+    binarios += list(BINARIOS_CHROME)
+    if platform.system() == "Darwin":
+        binarios.append("/Applications/Google Chrome.app/Contents/MacOS/Google Chrome")
+    for binario in binarios:
+        salida = _ejecutar([binario, "--version"])
+        coincidencia = PATRON_VERSION.search(salida or "")
+        if coincidencia:
+            return coincidencia.group(0)
+    return None
+
+
+def _ejecutar(comando):
+    try:
+        return subprocess.run(comando, capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def clave_version(version: str) -> str:
+    """
+    Clave de cache: MAJOR.MINOR.BUILD. ChromeDriver se publica por build, así que cualquier
+    parche de Chrome del mismo build usa el mismo driver.
+    """
+    return ".".join(version.split(".")[:3])
+
+
+def cargar_indice(cfg=None) -> dict:
+    ruta = carpeta_cache(cfg) / INDICE_DRIVERS
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Índice de drivers ilegible ({e}), se reconstruye")
+        return {}
+
+
+def _guardar_indice(cfg, indice):
+    ruta = carpeta_cache(cfg) / INDICE_DRIVERS
+    temporal = ruta.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(indice, f, indent=2)
+    os.replace(temporal, ruta)
+
+
+def _driver_cacheado(cfg, clave):
+    """Retorna la ruta del driver cacheado para la clave si existe en disco."""
+    entrada = cargar_indice(cfg).get(clave)
+    if entrada and Path(entrada["ruta"]).is_file():
+        return entrada["ruta"]
+    return None
+
+
+def _driver_mismo_major(cfg, clave):
+    """En modo offline, acepta el driver más reciente con el mismo major de Chrome."""
+    major = clave.split(".")[0]
+    candidatas = [
+        (tuple(int(p) for p in k.split(".")), v["ruta"])
+        for k, v in cargar_indice(cfg).items()
+        if k.split(".")[0] == major and Path(v["ruta"]).is_file()
+    ]
+    return max(candidatas)[1] if candidatas else None
+
+
+def descargar_driver(cfg, clave):
+    """
+    Obtiene el driver con webdriver_manager (red) y lo copia a la cache local.
+    """
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    logger.info(f"Driver para Chrome {clave} no está en cache. Descargando con webdriver_manager.")
+    origen = Path(ChromeDriverManager().install())
+    destino_dir = carpeta_cache(cfg) / clave
+    destino_dir.mkdir(parents=True, exist_ok=True)
+    destino = destino_dir / origen.name
+    shutil.copy2(origen, destino)
+    destino.chmod(destino.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    indice = cargar_indice(cfg)
+    indice[clave] = {"ruta": str(destino.absolute()), "fecha": datetime.now().isoformat(timespec="seconds")}
+    _guardar_indice(cfg, indice)
+    logger.info(f"Driver guardado en cache: {destino}")
+    return str(destino.absolute())
+
+
+def obtener_chromedriver(cfg=None) -> str:
+    """
+    Retorna la ruta del ChromeDriver compatible con el Chrome instalado, usando la cache local.
+
+    Orden de resolución: [chromedriver] ruta_driver explícita, resultado ya resuelto en el
+    proceso, cache en disco por versión de Chrome y, solo si no es modo offline, descarga
+    con webdriver_manager. En modo offline nunca se accede a la red.
+    """
+    config = _config_chromedriver(cfg)
+    if config.get("ruta_driver"):
+        return config["ruta_driver"]
+
+    offline = es_offline(cfg)
+    version = version_chrome()
+    if version is None:
+        if offline:
+            raise RuntimeError("No se pudo detectar la versión de Chrome y el modo offline está activo")
+        logger.warning("No se pudo detectar la versión de Chrome, se usa webdriver_manager directamente")
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager().install()
+
+    clave = clave_version(version)
+    with _lock:
+        if clave not in _resuelto:
+            _resuelto[clave] = _resolver_version(cfg, clave, version, offline)
+        return _resuelto[clave]
+
+
+def _resolver_version(cfg, clave, version, offline):
+    ruta = _driver_cacheado(cfg, clave)
+    if ruta:
+        logger.info(f"ChromeDriver para Chrome {version} tomado de la cache: {ruta}")
+    elif offline:
+        ruta = _driver_mismo_major(cfg, clave)
+        if not ruta:
+            raise RuntimeError(f"Modo offline: no hay ChromeDriver en cache para Chrome {version}")
+        logger.warning(f"Modo offline: se usa el driver cacheado del mismo major para Chrome {version}: {ruta}")
+    else:
+        ruta = descargar_driver(cfg, clave)
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache local de ChromeDriver por versión de Chrome")
+    parser.add_argument("--prewarm", action="store_true", help="Descarga y cachea el driver del Chrome instalado")
+    parser.add_argument("--listar", action="store_true", help="Muestra los drivers en cache")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    from config.config import cargar_configuracion
+    cfg = cargar_configuracion()
+
+    if args.prewarm:
+        print(obtener_chromedriver(cfg))
+    if args.listar or not args.prewarm:
+        for clave, entrada in sorted(cargar_indice(cfg).items()):
+            print(f"{clave}\t{entrada['fecha']}\t{entrada['ruta']}")
+
+
+if __name__ == "__main__":
+    main()
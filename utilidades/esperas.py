@@ -0,0 +1,134 @@
+import time
+import logging
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException, JavascriptException
+)
+
+logger = logging.getLogger("Utils - Esperas")
+
+# Tiempo máximo por defecto (segundos) para un paso sin valor en [esperas]
+MAXIMO_POR_DEFECTO = 30
+# Frecuencia de sondeo (segundos) de las condiciones
+INTERVALO_POR_DEFECTO = 0.25
+
+# Cantidad de recursos cargados por la página (del frame actual)
+SCRIPT_RECURSOS = "return window.performance.getEntriesByType('resource').length;"
+
+
+def documento_listo():
+    """Condición: document.readyState es 'complete'."""
+    def _condicion(driver):
+        return driver.execute_script("return document.readyState") == "complete"
+    return _condicion
+
+
+def elemento_presente(locator):
+    """Condición: el elemento existe en el DOM. Retorna el elemento."""
+    return EC.presence_of_element_located(locator)
+
+
+def elemento_clickeable(locator):
+    """Condición: el elemento es visible y está habilitado. Retorna el elemento."""
+    return EC.element_to_be_clickable(locator)
+
+
+def elemento_obsoleto(elemento):
+    """Condición: el elemento ya no está en el DOM (la página navegó)."""
+    return EC.staleness_of(elemento)
+
+
+def alerta_presente():
+    """Condición: hay una alerta abierta. Retorna la alerta."""
+    return EC.alert_is_present()
+
+
+def red_inactiva(quieto=0.5):
+    """
+    Condición: el número de recursos cargados por la página no cambia durante `quieto`
+    segundos (aproximación de network idle mediante la Performance API).
+    """
+    estado = {"cantidad": None, "desde": None}
+    def _condicion(driver):
+        cantidad = driver.execute_script(SCRIPT_RECURSOS)
+        ahora = time.monotonic()
+        if cantidad != estado["cantidad"]:
+            estado["cantidad"], estado["desde"] = cantidad, ahora
+            return False
+        return ahora - estado["desde"] >= quieto
+    return _condicion
+
+
+def pagina_estable(quieto=0.5):
+    """Condición: documento completo y red inactiva."""
+    listo = documento_listo()
+    inactiva = red_inactiva(quieto)
+    def _condicion(driver):
+        return listo(driver) and inactiva(driver)
+    return _condicion
+
+
+class EsperaAdaptativa:
+    """
+    Capa de esperas por condición para la navegación en BBVA Netcash.
+
+    Reemplaza los time.sleep fijos: cada paso sondea una condición de disponibilidad
+    hasta un máximo configurable en la sección [esperas] de config.ini (clave = nombre
+    del paso) y registra el tiempo real que tomó, para ajustar los máximos con datos.
+    """
+
+    def __init__(self, driver, cfg=None):
+        self.driver = driver
+        self.config = dict(cfg.get("esperas", {})) if cfg else {}
+        self.intervalo = float(self.config.get("intervalo", INTERVALO_POR_DEFECTO))
+        self.maximo_por_defecto = float(self.config.get("maximo_por_defecto", MAXIMO_POR_DEFECTO))
+        self.tiempos = []
+
+    def maximo(self, paso, maximo=None):
+        """Tiempo máximo del paso: config.ini, luego el valor indicado, luego el por defecto."""
+        if paso in self.config:
+            return float(self.config[paso])
+        return float(maximo) if maximo is not None else self.maximo_por_defecto
+
+    def esperar(self, paso, condicion, maximo=None, obligatorio=True):
+        """
+        Espera hasta que la condición retorne un valor verdadero.
+
+        :param paso: Nombre del paso (se usa para el máximo configurado y el registro).
+        :param condicion: Callable que recibe el driver.
+        :param maximo: Máximo por defecto del paso si config.ini no lo define.
+        :param obligatorio: Si es False, al agotar el tiempo retorna None en vez de lanzar.
+        :return: El valor retornado por la condición.
+        """
+        limite = self.maximo(paso, maximo)
+        inicio = time.perf_counter()
+        try:
+            resultado = WebDriverWait(
+                self.driver, limite, poll_frequency=self.intervalo,
+                ignored_exceptions=(NoSuchElementException, StaleElementReferenceException, JavascriptException)
+            ).until(condicion)
+            self._registrar(paso, inicio, limite, True)
+            return resultado
+        except TimeoutException:
+            self._registrar(paso, inicio, limite, False)
+            if obligatorio:
+                raise
+            logger.warning(f"Paso '{paso}' sin confirmar tras {limite:.1f}s, se continúa")
+            return None
+
+    def _registrar(self, paso, inicio, limite, ok):
+        segundos = time.perf_counter() - inicio
+        self.tiempos.append({"paso": paso, "segundos": round(segundos, 3), "maximo": limite, "ok": ok})
+        logger.debug(f"Paso '{paso}': {segundos:.2f}s de {limite:.1f}s ({'ok' if ok else 'timeout'})")
+
+    def resumen(self):
+        """Registra en el log el tiempo de cada paso y retorna la lista de tiempos."""
+        total = sum(t["segundos"] for t in self.tiempos)
+        logger.info(f"Tiempo total en esperas: {total:.2f}s en {len(self.tiempos)} pasos")
+        for t in self.tiempos:
+            logger.info(
+                f"  {t['paso']}: {t['segundos']:.2f}s / máx {t['maximo']:.1f}s"
+                f"{'' if t['ok'] else ' (timeout)'}"
+            )
+        return self.tiempos
@@ -0,0 +1,191 @@
+import logging
+import math
+import multiprocessing
+import os
+import polars as pl
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+
+# Configuración del logger
+logger = logging.getLogger("Utils - Formato BBVA")
+
+# Cada registro del archivo de recaudo BBVA tiene un ancho fijo de 360 caracteres
+LONGITUD_REGISTRO = 360
+RUC_EMPRESA = "20537140489"
+FECHA_VIGENCIA = "20391231"
+COLUMNAS_REQUERIDAS = ['TipoDocumento', 'NumeroDocumento', 'NombreCompleto', 'BIN']
+# Filas mínimas por partición: con menos, arrancar los procesos cuesta más que formatear
+MIN_FILAS_PARTICION = 200_000
+
+
+def generar_header(moneda, fecha_proceso=None):
+    """
+    Genera la línea de cabecera (01) del archivo TXT.
+
+    :param moneda: Moneda del archivo ("USD" o "PEN").
+    :param fecha_proceso: Fecha en formato YYYYMMDD (por defecto la fecha actual).
+    :return: Línea de cabecera de 360 caracteres (sin salto de línea).
+    """
+    if fecha_proceso is None:
+        fecha_proceso = datetime.now().strftime("%Y%m%d")
+
+    header = "01"  # Tipo de registro
+    header += RUC_EMPRESA  # RUC EMPRESA (código fijo)
+    header += "000"  # NRO CLASE (siempre 000)
+    header += moneda  # Moneda (USD o PEN)
+    header += fecha_proceso  # Fecha actual
+    header += "011"  # Versión (siempre 011)
+    header += " " * 7  # Espacios
+    header += "P"  # Tipo de proceso
+    return header.ljust(LONGITUD_REGISTRO)
+
+
+def generar_total(total_registros):
+    """
+    Genera la línea de total (03) del archivo TXT.
+
+    :param total_registros: Número de registros de detalle.
+    :return: Línea de total de 360 caracteres (sin salto de línea).
+    """
+    linea_total = "03"  # Tipo de registro
+    linea_total += "000000"  # Ceros de relleno
+    linea_total += str(total_registros).zfill(9)  # Total de registros (9 dígitos)
+    linea_total += "0" * 52  # Ceros de relleno adicional
+    return linea_total.ljust(LONGITUD_REGISTRO)
+
+
+def expr_detalle() -> pl.Expr:
+    """
+    Expresión Polars que construye la línea de detalle (02) de cada fila.
+
+    Replica el formato del recorrido fila a fila: nombre en mayúsculas y sin espacios
+    laterales truncado a 30 y 28 caracteres, documento sin espacios rellenado a 8
+    (sin truncar) y las dos fechas de vigencia fijas. Los valores nulos se escriben
+    como "nan", igual que str() sobre un NaN de pandas.
+    """
+    nombre = (
+        pl.col("NombreCompleto").cast(pl.Utf8).fill_null("nan")
+        .str.to_uppercase().str.strip_chars()
+    )
+    documento = pl.col("NumeroDocumento").cast(pl.Utf8).fill_null("nan").str.strip_chars()
+
+    return pl.concat_str([
+        pl.lit("02"),  # Tipo de registro
+        nombre.str.slice(0, 30).str.pad_end(30),  # Nombre completo (30 caracteres)
+        documento.str.pad_end(8),  # Número de documento (8 caracteres)
+        pl.lit(" " * 12),  # Espacios de relleno (12 caracteres)
+        nombre.str.slice(0, 28).str.pad_end(28),  # Nombre corto (28 caracteres)
+        pl.lit(FECHA_VIGENCIA),  # Fecha de inicio (YYYYMMDD)
+        pl.lit(FECHA_VIGENCIA),  # Fecha de fin (YYYYMMDD)
+    ]).str.pad_end(LONGITUD_REGISTRO).alias("linea")
+
+
+def construir_detalle(df: pl.DataFrame) -> str:
+    """
+    Construye en una sola pasada columnar el bloque de líneas de detalle (02).
+
+    :param df: DataFrame con las columnas NombreCompleto y NumeroDocumento.
+    :return: Bloque de texto con una línea por fila, cada una terminada en salto de línea.
+    """
+    if df.is_empty():
+        return ""
+    lineas = df.select(expr_detalle()).to_series()
+    return lineas.str.join("\n").item() + "\n"
+
+
+def procesos_detalle(cfg) -> int:
+    """
+    Procesos para formatear el detalle ([procesamiento] procesos): 1 es serial y 0 usa
+    todos los núcleos.
+    """
+    procesos = int(cfg.get("procesamiento", {}).get("procesos", 1))
+    return procesos if procesos > 0 else os.cpu_count() or 1
+
+
+def construir_detalle_paralelo(df: pl.DataFrame, procesos: int) -> str:
+    """
+    construir_detalle repartido en `procesos` procesos por rangos de filas contiguos. Los
+    bloques se unen en el orden de las particiones, así que el resultado es idéntico al
+    serial. Reportes con menos de 2 * MIN_FILAS_PARTICION filas se formatean en serie.
+
+    Los procesos se crean con "spawn": hacer fork de un proceso que ya usó el pool de
+    hilos de Polars puede bloquearse.
+    """
+    procesos = min(procesos, df.height // MIN_FILAS_PARTICION)
+    if procesos <= 1:
+        return construir_detalle(df)
+    tamano = math.ceil(df.height / procesos)
+    # Solo las columnas del detalle viajan a los procesos
+    columnas = df.select("NombreCompleto", "NumeroDocumento")
+    particiones = [columnas.slice(inicio, tamano) for inicio in range(0, df.height, tamano)]
+    logger.info(f"Formateando {df.height} registros en {len(particiones)} particiones paralelas")
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as executor:
+        return "".join(executor.map(construir_detalle, particiones))
+
+
+def codificar_detalle(detalle: str) -> bytes:
+    """
+    Bytes que escribiría un archivo en modo texto: saltos de línea del sistema (os.linesep)
+    y UTF-8. Un registro no siempre ocupa LONGITUD_REGISTRO + 1 bytes: las letras con tilde
+    y la Ñ ocupan dos bytes en UTF-8, y en Windows el salto de línea es "\r\n".
+    """
+    if os.linesep != "\n":
+        detalle = detalle.replace("\n", os.linesep)
+    return detalle.encode("utf-8")
+
+
+def escribir_txt(archivo_salida, moneda, detalle, total_registros, fecha_proceso=None):
+    """
+    Escribe el archivo TXT completo (cabecera, detalle y total) en binario, sin la
+    traducción de saltos de línea ni la codificación del modo texto. Al generar varias
+    monedas conviene pasar el detalle ya codificado con codificar_detalle, que se hace
+    una sola vez para todos los archivos.
+
+    :param archivo_salida: Ruta del archivo TXT de salida.
+    :param moneda: Moneda del archivo ("USD" o "PEN").
+    :param detalle: Bloque de detalle de construir_detalle (str) o codificado (bytes).
+    :param total_registros: Número de registros de detalle.
+    :param fecha_proceso: Fecha de proceso YYYYMMDD (opcional).
+    """
+    if isinstance(detalle, str):
+        detalle = codificar_detalle(detalle)
+    with open(archivo_salida, 'wb') as archivo:
+        archivo.write(codificar_detalle(generar_header(moneda, fecha_proceso) + "\n"))
+        archivo.write(detalle)
+        archivo.write(codificar_detalle(generar_total(total_registros) + "\n"))
+    logger.info(f"Archivo TXT escrito: {archivo_salida} ({total_registros} registros, moneda {moneda})")
+
+
+def escribir_txt_por_lotes(salidas, detalles, fecha_proceso=None):
+    """
+    Escribe los TXT de varias monedas a partir de bloques de detalle generados por lotes,
+    sin armar el contenido completo en memoria. Cada bloque se codifica una vez para todos
+    los archivos. El resultado es idéntico al de escribir_txt.
+
+    :param salidas: Diccionario moneda -> ruta del TXT de salida.
+    :param detalles: Iterable de tuplas (bloque de detalle, registros del bloque).
+    :param fecha_proceso: Fecha de proceso YYYYMMDD (opcional).
+    :return: Número total de registros de detalle escritos.
+    """
+    total_registros = 0
+    with ExitStack() as pila:
+        archivos = {
+            moneda: pila.enter_context(open(archivo_salida, 'wb'))
+            for moneda, archivo_salida in salidas.items()
+        }
+        for moneda, archivo in archivos.items():
+            archivo.write(codificar_detalle(generar_header(moneda, fecha_proceso) + "\n"))
+        for detalle, registros in detalles:
+            bloque = codificar_detalle(detalle)
+            for archivo in archivos.values():
+                archivo.write(bloque)
+            total_registros += registros
+        # El total (03) solo se conoce después del último lote
+        total = codificar_detalle(generar_total(total_registros) + "\n")
+        for archivo in archivos.values():
+            archivo.write(total)
+    for moneda, archivo_salida in salidas.items():
+        logger.info(f"Archivo TXT escrito: {archivo_salida} ({total_registros} registros, moneda {moneda})")
+    return total_registros
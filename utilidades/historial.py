@@ -0,0 +1,192 @@
+import argparse
+import logging
+import sqlite3
+import statistics
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger("Utils - Historial")
+
+ARCHIVO_HISTORIAL = "historial_ejecuciones.sqlite"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    inicio TEXT NOT NULL,
+    fin TEXT,
+    exito INTEGER,
+    reanudada INTEGER
+);
+CREATE TABLE IF NOT EXISTS bots (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(id),
+    bot TEXT NOT NULL,
+    inicio TEXT,
+    estado TEXT NOT NULL,
+    segundos REAL,
+    filas INTEGER,
+    bytes_descargados INTEGER,
+    bytes_subidos INTEGER,
+    reintentos INTEGER,
+    mensaje TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bots_bot_inicio ON bots (bot, inicio);
+"""
+
+# Estados que cuentan como ejecución real del bot (omitidos y cancelados no)
+ESTADOS_EJECUTADOS = ("ok", "fallido", "timeout")
+
+
+def ruta_historial(cfg) -> Path:
+    return Path(cfg["rutas"]["ruta_estado"]) / ARCHIVO_HISTORIAL
+
+
+def conectar(ruta) -> sqlite3.Connection:
+    conexion = sqlite3.connect(ruta)
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+
+def registrar_ejecucion(cfg, inicio, resultados, metricas, nombres, reanudada=False):
+    """
+    Guarda una fila por bot de la ejecución.
+
+    :param resultados: {clave: ResultadoNodo} del orquestador.
+    :param metricas: Lista de métricas de Instrumentacion (una por bot ejecutado).
+    :param nombres: {clave: nombre del bot}, para unir resultados y métricas.
+    """
+    por_bot = {metrica["bot"]: metrica for metrica in metricas}
+    exito = all(resultado.exitoso for resultado in resultados.values())
+    with closing(conectar(ruta_historial(cfg))) as conexion, conexion:
+        cursor = conexion.execute(
+            "INSERT INTO ejecuciones (inicio, fin, exito, reanudada) VALUES (?, ?, ?, ?)",
+            (inicio.isoformat(timespec="seconds"), datetime.now().isoformat(timespec="seconds"),
+             int(exito), int(reanudada)),
+        )
+        ejecucion_id = cursor.lastrowid
+        filas = []
+        for clave, resultado in resultados.items():
+            nombre = nombres[clave]
+            metrica = por_bot.get(nombre, {})
+            filas.append((
+                ejecucion_id, nombre, metrica.get("inicio", inicio.isoformat(timespec="seconds")),
+                resultado.estado, metrica.get("segundos", resultado.segundos or None),
+                metrica.get("filas"), metrica.get("bytes_descargados"), metrica.get("bytes_subidos"),
+                metrica.get("reintentos", 0 if resultado.estado in ESTADOS_EJECUTADOS else None),
+                str(resultado.mensaje)[:500],
+            ))
+        conexion.executemany(
+            "INSERT INTO bots (ejecucion_id, bot, inicio, estado, segundos, filas, bytes_descargados, "
+            "bytes_subidos, reintentos, mensaje) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            filas,
+        )
+    logger.info(f"Ejecución {ejecucion_id} registrada en el historial ({len(filas)} bots)")
+    return ejecucion_id
+
+
+def _percentil(valores, percentil):
+    """Percentil con interpolación (statistics.quantiles necesita al menos 2 valores)."""
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method="inclusive")[percentil - 1]
+
+
+def _periodo(fecha_iso, agrupacion):
+    fecha = datetime.fromisoformat(fecha_iso)
+    if agrupacion == "semana":
+        anio, semana, _ = fecha.isocalendar()
+        return f"{anio}-S{semana:02d}"
+    if agrupacion == "mes":
+        return fecha.strftime("%Y-%m")
+    return fecha.strftime("%Y-%m-%d")
+
+
+def tendencias(ruta, dias=30, agrupacion="semana", bot=None):
+    """
+    Retorna por bot y periodo: ejecuciones, p50/p95 de duración, tasa de fallos,
+    promedio de filas, reintentos y bytes.
+    """
+    desde = (datetime.now() - timedelta(days=dias)).isoformat(timespec="seconds")
+    consulta = (
+        "SELECT bot, inicio, estado, segundos, filas, reintentos, bytes_descargados, bytes_subidos "
+        "FROM bots WHERE inicio >= ? AND estado IN ({})".format(",".join("?" * len(ESTADOS_EJECUTADOS)))
+    )
+    parametros = [desde, *ESTADOS_EJECUTADOS]
+    if bot:
+        consulta += " AND bot LIKE ?"
+        parametros.append(f"%{bot}%")
+    with closing(conectar(ruta)) as conexion:
+        registros = conexion.execute(consulta + " ORDER BY inicio", parametros).fetchall()
+
+    grupos = {}
+    for nombre, inicio, estado, segundos, filas, reintentos, descargados, subidos in registros:
+        grupo = grupos.setdefault((nombre, _periodo(inicio, agrupacion)), {
+            "duraciones": [], "fallos": 0, "total": 0, "filas": [], "reintentos": [], "bytes": []
+        })
+        grupo["total"] += 1
+        grupo["fallos"] += estado != "ok"
+        if segundos is not None:
+            grupo["duraciones"].append(segundos)
+        if filas is not None:
+            grupo["filas"].append(filas)
+        if reintentos is not None:
+            grupo["reintentos"].append(reintentos)
+        if descargados or subidos:
+            grupo["bytes"].append((descargados or 0) + (subidos or 0))
+
+    filas_reporte = []
+    for (nombre, periodo), grupo in sorted(grupos.items()):
+        duraciones = grupo["duraciones"]
+        filas_reporte.append({
+            "bot": nombre,
+            "periodo": periodo,
+            "ejecuciones": grupo["total"],
+            "p50_s": round(_percentil(duraciones, 50), 1) if duraciones else None,
+            "p95_s": round(_percentil(duraciones, 95), 1) if duraciones else None,
+            "tasa_fallos": round(grupo["fallos"] / grupo["total"], 3),
+            "filas_prom": round(statistics.mean(grupo["filas"])) if grupo["filas"] else None,
+            "reintentos_prom": round(statistics.mean(grupo["reintentos"]), 2) if grupo["reintentos"] else None,
+            "mb_prom": round(statistics.mean(grupo["bytes"]) / (1024 * 1024), 2) if grupo["bytes"] else None,
+        })
+    return filas_reporte
+
+
+def imprimir_reporte(filas_reporte):
+    columnas = ["bot", "periodo", "ejecuciones", "p50_s", "p95_s", "tasa_fallos", "filas_prom",
+                "reintentos_prom", "mb_prom"]
+    anchos = {
+        columna: max([len(columna)] + [len("-" if fila[columna] is None else str(fila[columna])) for fila in filas_reporte])
+        for columna in columnas
+    }
+    print("  ".join(columna.ljust(anchos[columna]) for columna in columnas))
+    for fila in filas_reporte:
+        print("  ".join(
+            ("-" if fila[columna] is None else str(fila[columna])).ljust(anchos[columna]) for columna in columnas
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de tendencias del historial de ejecuciones")
+    parser.add_argument("--dias", type=int, default=30, help="Días hacia atrás a considerar")
+    parser.add_argument("--agrupar", choices=["dia", "semana", "mes"], default="semana")
+    parser.add_argument("--bot", help="Filtrar por nombre de bot (coincidencia parcial)")
+    parser.add_argument("--archivo", help="Ruta del historial (por defecto ruta_estado de config.ini)")
+    args = parser.parse_args()
+
+    if args.archivo:
+        ruta = Path(args.archivo)
+    else:
+        from config.config import cargar_configuracion
+        ruta = ruta_historial(cargar_configuracion())
+    if not ruta.exists():
+        print(f"No existe el historial {ruta}")
+        return
+    filas_reporte = tendencias(ruta, args.dias, args.agrupar, args.bot)
+    if not filas_reporte:
+        print(f"Sin ejecuciones en los últimos {args.dias} días")
+        return
+    imprimir_reporte(filas_reporte)
+
+
+if __name__ == "__main__":
+    main()
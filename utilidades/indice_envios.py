@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+import polars as pl
+import variables_globales as vg
+
+logger = logging.getLogger("Utils - Índice de Envíos")
+
+# Carpeta (dentro de ruta_estado) con un índice por moneda y las claves pendientes de confirmar
+CARPETA_INDICE = "indice_envios"
+ARCHIVO_PENDIENTE = "pendiente.parquet"
+MONEDAS_POR_DEFECTO = ("USD", "PEN")
+# Texto del radio button de Netcash -> moneda del índice
+MONEDA_POR_CARGA = {"SOLES": "PEN", "DOLARES": "USD"}
+
+ESQUEMA_INDICE = {"clave": pl.Utf8, "huella": pl.Utf8, "fecha": pl.Utf8}
+
+# Bot 04 y Bot 05 pueden confirmar en paralelo
+_lock = threading.Lock()
+
+
+def delta_activo(cfg) -> bool:
+    return str(cfg.get("delta", {}).get("activo", "False")).lower() == "true"
+
+
+def carpeta_indice(cfg) -> Path:
+    return Path(cfg["rutas"]["ruta_estado"]) / CARPETA_INDICE
+
+
+def ruta_indice(cfg, moneda) -> Path:
+    return carpeta_indice(cfg) / f"enviados_{moneda}.parquet"
+
+
+def monedas_indice(cfg) -> list:
+    """Monedas con índice propio: las mismas de [salidas_bbva]."""
+    return list(cfg.get("salidas_bbva", {}) or MONEDAS_POR_DEFECTO)
+
+
+def expr_clave() -> pl.Expr:
+    """Cliente: tipo y número de documento ya limpios por procesar_df."""
+    return pl.concat_str([pl.col("Tipo Documento"), pl.col("Numero Documento")], separator="|").alias("clave")
+
+
+def expr_huella(columnas) -> pl.Expr:
+    """
+    Datos de la afiliación que, si cambian, obligan a reenviar al cliente (nombre y BIN).
+    Se guarda el texto y no un hash de Polars porque ese hash no es estable entre versiones.
+    """
+    return pl.concat_str(
+        [pl.col(columna).fill_null("") for columna in ("Nombres", "Bin") if columna in columnas],
+        separator="|",
+    ).alias("huella")
+
+
+def cargar_indice(cfg, moneda) -> pl.DataFrame:
+    """Claves ya enviadas para la moneda (vacío si el índice no existe o está dañado)."""
+    ruta = ruta_indice(cfg, moneda)
+    if ruta.exists():
+        try:
+            return pl.read_parquet(ruta)
+        except Exception as e:
+            logger.warning(f"Índice de envíos {ruta} ilegible ({e}), se trata como vacío")
+    return pl.DataFrame(schema=ESQUEMA_INDICE)
+
+
+def filtrar_delta(df: pl.DataFrame, cfg):
+    """
+    Deja solo las afiliaciones nuevas o con nombre/BIN cambiado en alguna moneda y guarda
+    sus claves como pendientes. Un cliente repetido en el reporte se envía una vez, con su
+    última fila (la misma que conserva el índice).
+
+    El archivo que se carga en BBVA es el mismo para todas las monedas, así que una fila
+    se omite solo si ya se confirmó en todas.
+
+    :return: (DataFrame delta, ruta del archivo de claves pendientes)
+    """
+    lf = (
+        df.lazy().with_columns(expr_clave(), expr_huella(df.columns))
+        .unique(subset="clave", keep="last", maintain_order=True)
+    )
+    marcas = []
+    for moneda in monedas_indice(cfg):
+        marca = f"_enviado_{moneda}"
+        enviados = cargar_indice(cfg, moneda).lazy().select("clave", "huella", pl.lit(True).alias(marca))
+        lf = lf.join(enviados, on=["clave", "huella"], how="left")
+        marcas.append(pl.col(marca).fill_null(False))
+    delta = lf.filter(~pl.all_horizontal(marcas)).collect()
+    logger.info(f"Modo delta: {delta.height} de {df.height} filas son nuevas o cambiaron")
+
+    carpeta_indice(cfg).mkdir(parents=True, exist_ok=True)
+    ruta_pendiente = carpeta_indice(cfg) / ARCHIVO_PENDIENTE
+    delta.select("clave", "huella", pl.lit(datetime.now().strftime("%Y-%m-%d")).alias("fecha")).write_parquet(ruta_pendiente)
+    return delta.select(df.columns), ruta_pendiente
+
+
+def confirmar_envios(cfg, moneda):
+    """
+    Agrega al índice de la moneda las claves pendientes de esta ejecución. Se llama solo
+    después de que BBVA aceptó la carga: si falla, las filas se vuelven a enviar.
+    """
+    if not vg.envios_pendientes or not Path(vg.envios_pendientes).exists():
+        return
+    with _lock:
+        pendientes = pl.read_parquet(vg.envios_pendientes)
+        # La última afiliación enviada de cada cliente reemplaza a la anterior
+        indice = (
+            pl.concat([cargar_indice(cfg, moneda), pendientes], how="vertical_relaxed")
+            .unique(subset="clave", keep="last", maintain_order=True)
+        )
+        ruta = ruta_indice(cfg, moneda)
+        temporal = ruta.with_suffix(".tmp")
+        indice.write_parquet(temporal)
+        os.replace(temporal, ruta)
+    logger.info(f"Índice de envíos {moneda} actualizado: {pendientes.height} claves confirmadas, {indice.height} en total")
+
+
+def confirmar_carga(cfg, moneda_carga):
+    """
+    confirmar_envios para una carga de Netcash ("SOLES" o "DOLARES"). Un error al escribir
+    el índice no invalida la carga: solo se registra y esas filas se reenvían la próxima vez.
+    """
+    try:
+        confirmar_envios(cfg, MONEDA_POR_CARGA[moneda_carga])
+    except Exception as e:
+        logger.warning(f"[{moneda_carga}] No se pudo actualizar el índice de envíos: {e}")
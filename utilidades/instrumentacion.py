@@ -0,0 +1,182 @@
+import csv
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+import psutil
+
+logger = logging.getLogger("Utils - Instrumentación")
+
+MB = 1024 * 1024
+INTERVALO_POR_DEFECTO = 0.2
+
+# Métricas adicionales que reporta el bot en ejecución (ver registrar); una por hilo
+_contexto = threading.local()
+
+
+def registrar(clave, valor):
+    """
+    Registra una métrica del bot que se está ejecutando en el hilo actual (filas, bytes,
+    reintentos...). Sin instrumentación activa no hace nada.
+    """
+    extras = getattr(_contexto, "extras", None)
+    if extras is not None:
+        extras[clave] = valor
+
+
+def incrementar(clave, cantidad=1):
+    """Suma `cantidad` a una métrica del bot en ejecución."""
+    extras = getattr(_contexto, "extras", None)
+    if extras is not None:
+        extras[clave] = extras.get(clave, 0) + cantidad
+
+
+def _cpu(tiempos):
+    return tiempos.user + tiempos.system
+
+
+class _Muestreador(threading.Thread):
+    """
+    Muestrea cada `intervalo` segundos el RSS del proceso y el RSS/CPU de sus procesos
+    hijos (Chrome y chromedriver), guardando los picos.
+    """
+
+    def __init__(self, intervalo):
+        super().__init__(daemon=True, name="muestreador-recursos")
+        self.intervalo = intervalo
+        self.desde = time.time()
+        self.proceso = psutil.Process()
+        self.detener = threading.Event()
+        self.rss_pico = self.proceso.memory_info().rss
+        self.hijos_rss_pico = 0
+        self.hijos_max = 0
+        # CPU acumulada por pid: primera y última lectura (los hijos pueden terminar entre muestras)
+        self._cpu_hijos = {}
+        self._muestrear()
+
+    def _muestrear(self):
+        try:
+            self.rss_pico = max(self.rss_pico, self.proceso.memory_info().rss)
+            hijos = self.proceso.children(recursive=True)
+        except psutil.Error:
+            return
+        rss_hijos = 0
+        for hijo in hijos:
+            try:
+                with hijo.oneshot():
+                    rss_hijos += hijo.memory_info().rss
+                    cpu = _cpu(hijo.cpu_times())
+                    # Un hijo lanzado durante el bot cuenta su CPU desde cero
+                    base = 0.0 if hijo.create_time() >= self.desde else cpu
+            except psutil.Error:
+                continue
+            primera, _ = self._cpu_hijos.get(hijo.pid, (base, cpu))
+            self._cpu_hijos[hijo.pid] = (primera, cpu)
+        self.hijos_rss_pico = max(self.hijos_rss_pico, rss_hijos)
+        self.hijos_max = max(self.hijos_max, len(hijos))
+
+    def run(self):
+        while not self.detener.wait(self.intervalo):
+            self._muestrear()
+
+    def finalizar(self):
+        self.detener.set()
+        self.join()
+        self._muestrear()
+
+    @property
+    def hijos_cpu(self):
+        return sum(ultima - primera for primera, ultima in self._cpu_hijos.values())
+
+
+class Instrumentacion:
+    """
+    Mide cada bot del orquestador: tiempo real, CPU del hilo y del proceso, pico de RSS
+    del proceso y recursos de los procesos hijos (Chrome). Las métricas se guardan en
+    JSON y CSV en la carpeta de logs y se resumen para el webhook.
+
+    Con bots en paralelo la CPU del proceso y los recursos de los hijos se reparten entre
+    los bots que coinciden en el tiempo; la CPU del hilo sí es exclusiva de cada bot, pero
+    no incluye hilos internos (descargas paralelas de Bot 01, hilos de Polars).
+    """
+
+    def __init__(self, cfg=None):
+        config = dict(cfg.get("instrumentacion", {})) if cfg else {}
+        self.intervalo = float(config.get("intervalo_muestreo", INTERVALO_POR_DEFECTO))
+        self.inicio = datetime.now()
+        self.metricas = []
+        self._lock = threading.Lock()
+
+    def instrumentar(self, nombre, funcion):
+        """Envuelve bot_run(cfg, mensaje) para registrar sus métricas."""
+        @wraps(funcion)
+        def _instrumentada(cfg, mensaje):
+            _contexto.extras = {}
+            muestreador = _Muestreador(self.intervalo)
+            muestreador.start()
+            proceso = psutil.Process()
+            cpu_proceso = _cpu(proceso.cpu_times())
+            cpu_hilo = time.thread_time()
+            inicio = time.perf_counter()
+            fecha_inicio = datetime.now()
+            resultado = False
+            try:
+                resultado, mensaje = funcion(cfg, mensaje)
+                return resultado, mensaje
+            finally:
+                segundos = time.perf_counter() - inicio
+                muestreador.finalizar()
+                metrica = {
+                    "bot": nombre,
+                    "inicio": fecha_inicio.isoformat(timespec="seconds"),
+                    "segundos": round(segundos, 3),
+                    "cpu_hilo_s": round(time.thread_time() - cpu_hilo, 3),
+                    "cpu_proceso_s": round(_cpu(proceso.cpu_times()) - cpu_proceso, 3),
+                    "rss_pico_mb": round(muestreador.rss_pico / MB, 1),
+                    "hijos_rss_pico_mb": round(muestreador.hijos_rss_pico / MB, 1),
+                    "hijos_cpu_s": round(muestreador.hijos_cpu, 3),
+                    "hijos_max": muestreador.hijos_max,
+                    "resultado": bool(resultado),
+                }
+                metrica.update(_contexto.extras)
+                _contexto.extras = None
+                with self._lock:
+                    self.metricas.append(metrica)
+                logger.info(
+                    f"{nombre}: {metrica['segundos']:.1f}s, CPU {metrica['cpu_proceso_s']:.1f}s, "
+                    f"RSS pico {metrica['rss_pico_mb']} MB, Chrome {metrica['hijos_rss_pico_mb']} MB / "
+                    f"{metrica['hijos_cpu_s']:.1f}s CPU"
+                )
+        return _instrumentada
+
+    def guardar(self, carpeta):
+        """Escribe metricas_<fecha>.json y metricas_<fecha>.csv en la carpeta indicada."""
+        carpeta = Path(carpeta)
+        carpeta.mkdir(parents=True, exist_ok=True)
+        base = carpeta / f"metricas_{self.inicio.strftime('%Y%m%d_%H%M%S')}"
+        with self._lock:
+            metricas = list(self.metricas)
+        with open(base.with_suffix(".json"), "w", encoding="utf-8") as f:
+            json.dump({"inicio": self.inicio.isoformat(timespec="seconds"), "bots": metricas}, f,
+                      indent=2, ensure_ascii=False)
+        columnas = list(dict.fromkeys(clave for metrica in metricas for clave in metrica))
+        with open(base.with_suffix(".csv"), "w", encoding="utf-8", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=columnas)
+            escritor.writeheader()
+            escritor.writerows(metricas)
+        logger.info(f"Métricas de la ejecución guardadas en {base}.json/.csv")
+        return base.with_suffix(".json"), base.with_suffix(".csv")
+
+    def resumen_texto(self):
+        """Resumen de una línea por bot para la notificación del webhook."""
+        lineas = ["Métricas por bot:"]
+        for m in self.metricas:
+            lineas.append(
+                f"- {m['bot']}: {m['segundos']:.1f}s | CPU {m['cpu_proceso_s']:.1f}s | "
+                f"RSS pico {m['rss_pico_mb']} MB | Chrome {m['hijos_rss_pico_mb']} MB, "
+                f"{m['hijos_cpu_s']:.1f}s CPU | {'OK' if m['resultado'] else 'FALLÓ'}"
+            )
+        return "\n".join(lineas)
@@ -0,0 +1,146 @@
+import logging
+from pathlib import Path
+import polars as pl
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger("Utils - Lotes")
+
+TAMANO_LOTE_POR_DEFECTO = 100_000
+# Filas de datos por hoja de Excel (1.048.576 menos la fila de encabezados)
+MAX_FILAS_XLSX = 1_048_575
+
+
+def modo_por_lotes(cfg) -> bool:
+    return str(cfg.get("procesamiento", {}).get("por_lotes", "False")).lower() == "true"
+
+
+def tamano_lote(cfg) -> int:
+    return int(cfg.get("procesamiento", {}).get("tamano_lote", TAMANO_LOTE_POR_DEFECTO))
+
+
+def _texto(valor):
+    """Valor de celda como texto; los números enteros guardados como float pierden el '.0'."""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _lote(encabezados, filas) -> pl.DataFrame:
+    return pl.DataFrame(filas, schema={nombre: pl.Utf8 for nombre in encabezados}, orient="row")
+
+
+def _iterar_xlsx(ruta, tamano):
+    """Lee el XLSX fila a fila con openpyxl en modo read_only (no carga la hoja completa)."""
+    import openpyxl
+
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezados = []
+        # Nombres únicos aunque haya columnas sin título o repetidas
+        for i, valor in enumerate(next(filas, ())):
+            nombre = f"__UNNAMED__{i}" if valor is None else str(valor)
+            encabezados.append(f"{nombre}_{i}" if nombre in encabezados else nombre)
+        columnas = len(encabezados)
+        lote = []
+        for fila in filas:
+            valores = [_texto(valor) for valor in fila[:columnas]]
+            lote.append(valores + [None] * (columnas - len(valores)))
+            if len(lote) == tamano:
+                yield _lote(encabezados, lote)
+                lote = []
+        if lote:
+            yield _lote(encabezados, lote)
+    finally:
+        libro.close()
+
+
+def iterar_lotes(ruta, tamano, motor="calamine"):
+    """
+    Itera el recaudo o el reporte intermedio en DataFrames de hasta `tamano` filas, con
+    todas las columnas como texto.
+
+    - .xlsx: openpyxl read_only, memoria acotada al lote.
+    - .arrow/.ipc y .parquet: lotes del archivo columnar (memory map para Arrow).
+    - .xls: el formato BIFF no permite leer por partes; se lee completo con `motor` y se
+      entrega en lotes. Una hoja .xls admite como máximo 65.536 filas, así que la memoria
+      sigue acotada.
+    """
+    sufijo = Path(ruta).suffix.lower()
+    if sufijo == ".xlsx":
+        yield from _iterar_xlsx(ruta, tamano)
+        return
+    if sufijo in (".arrow", ".ipc"):
+        with pa.memory_map(str(ruta)) as fuente:
+            lector = pa.ipc.open_file(fuente)
+            for i in range(lector.num_record_batches):
+                # Los lotes del archivo pueden ser más grandes que `tamano`
+                yield from pl.from_arrow(lector.get_batch(i)).iter_slices(tamano)
+        return
+    if sufijo == ".parquet":
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamano):
+            yield pl.from_arrow(lote)
+        return
+    df = pl.read_excel(ruta, engine=motor).select(pl.all().cast(pl.Utf8))
+    yield from df.iter_slices(tamano)
+
+
+class EscritorColumnar:
+    """
+    Escribe un DataFrame por lotes en Arrow IPC (sin compresión, legible con memory map)
+    o Parquet, sin acumularlo en memoria. El esquema lo fija el primer lote.
+    """
+
+    def __init__(self, ruta, formato):
+        if formato not in ("ipc", "parquet"):
+            raise ValueError(f"Formato intermedio no soportado por lotes: {formato}")
+        self.ruta = Path(ruta)
+        self.formato = formato
+        self._escritor = None
+
+    def escribir(self, df: pl.DataFrame):
+        tabla = df.to_arrow()
+        if self._escritor is None:
+            if self.formato == "ipc":
+                self._escritor = pa.ipc.new_file(str(self.ruta), tabla.schema)
+            else:
+                self._escritor = pq.ParquetWriter(str(self.ruta), tabla.schema)
+        self._escritor.write_table(tabla)
+
+    def cerrar(self, columnas=None):
+        """Cierra el archivo; sin lotes escritos genera uno vacío con las columnas indicadas."""
+        if self._escritor is None:
+            self.escribir(pl.DataFrame(schema={c: pl.Utf8 for c in columnas or []}))
+        self._escritor.close()
+
+
+class EscritorXlsx:
+    """
+    Copia XLSX escrita fila a fila con xlsxwriter en modo constant_memory: cada fila se
+    vuelca al disco al pasar a la siguiente. Sin formato de tabla, solo encabezados y valores.
+    """
+
+    def __init__(self, ruta):
+        import xlsxwriter
+
+        self.ruta = Path(ruta)
+        self._libro = xlsxwriter.Workbook(str(self.ruta), {"constant_memory": True})
+        self._hoja = self._libro.add_worksheet()
+        self._fila = 0
+
+    def escribir(self, df: pl.DataFrame):
+        if self._fila == 0:
+            self._hoja.write_row(0, 0, df.columns)
+            self._fila = 1
+        if self._fila + df.height - 1 > MAX_FILAS_XLSX:
+            raise ValueError(f"El reporte supera las {MAX_FILAS_XLSX:,} filas que admite una hoja XLSX")
+        for fila in df.iter_rows():
+            self._hoja.write_row(self._fila, 0, fila)
+            self._fila += 1
+
+    def cerrar(self):
+        self._libro.close()
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+import variables_globales as vg
+
+logger = logging.getLogger("Utils - Manifiesto")
+
+ARCHIVO_MANIFIESTO = "manifiesto_ejecucion.json"
+TAMANO_BLOQUE = 1024 * 1024
+
+
+def huella_archivo(ruta) -> str:
+    """SHA-256 del archivo leído por bloques."""
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def _rutas(valor):
+    """Rutas de archivo contenidas en un valor de variables_globales (str, Path, lista o dict)."""
+    if isinstance(valor, (str, Path)):
+        return [str(valor)] if str(valor) and Path(valor).is_file() else []
+    if isinstance(valor, dict):
+        valor = list(valor.values())
+    if isinstance(valor, (list, tuple)):
+        return [ruta for elemento in valor for ruta in _rutas(elemento)]
+    return []
+
+
+def _serializable(valor):
+    if isinstance(valor, Path):
+        return str(valor)
+    if isinstance(valor, dict):
+        return {str(k): _serializable(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_serializable(v) for v in valor]
+    return valor
+
+
+class Manifiesto:
+    """
+    Manifiesto de ejecución del orquestador (ruta_estado/manifiesto_ejecucion.json).
+
+    Registra por paso el resultado, la huella de sus entradas y sus salidas (variables de
+    variables_globales más el SHA-256 de cada archivo que referencian). Con reanudar=True
+    se omiten los pasos que terminaron bien, cuyas entradas no cambiaron, cuyos archivos
+    de salida siguen intactos y cuyas dependencias también se omitieron.
+
+    Las entradas de un paso se declaran como:
+      - "vg.<atributo>": valor de variables_globales (y hash de los archivos que referencia)
+      - "cfg.<seccion>": sección de config.ini
+      - "fecha": fecha del día (para pasos que dependen del día, como la descarga)
+    """
+
+    def __init__(self, cfg, reanudar=False):
+        self.ruta = Path(cfg["rutas"]["ruta_estado"]) / ARCHIVO_MANIFIESTO
+        self.cfg = cfg
+        self.reanudar = reanudar
+        self.anterior = self._cargar() if reanudar else {}
+        self.datos = {"inicio": datetime.now().isoformat(timespec="seconds"), "completado": False, "pasos": {}}
+        # Los pasos pueden registrarse desde varios hilos (orquestador en paralelo)
+        self._lock = threading.Lock()
+        if reanudar:
+            if self.anterior:
+                logger.info(f"Reanudando desde el manifiesto del {self.anterior.get('inicio')}")
+            else:
+                logger.info("No hay manifiesto previo: se ejecutan todos los pasos")
+
+    def _cargar(self):
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifiesto ilegible ({e}), se ejecutan todos los pasos")
+            return {}
+
+    def _guardar(self, nombre=None, paso=None):
+        """Escribe el manifiesto (registrando antes el paso indicado) de forma atómica."""
+        with self._lock:
+            if nombre is not None:
+                self.datos["pasos"][nombre] = paso
+            temporal = self.ruta.with_suffix(".tmp")
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self.datos, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, self.ruta)
+
+    def huella_entradas(self, entradas) -> str:
+        """Huella SHA-256 de las entradas declaradas de un paso."""
+        valores = {}
+        for entrada in entradas:
+            if entrada.startswith("vg."):
+                valor = getattr(vg, entrada[3:], None)
+                valores[entrada] = {
+                    "valor": _serializable(valor),
+                    "archivos": {ruta: huella_archivo(ruta) for ruta in _rutas(valor)},
+                }
+            elif entrada.startswith("cfg."):
+                valores[entrada] = dict(self.cfg.get(entrada[4:], {}))
+            elif entrada == "fecha":
+                valores[entrada] = datetime.now().strftime("%Y-%m-%d")
+        contenido = json.dumps(valores, sort_keys=True, default=str)
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+    def puede_omitir(self, nombre, huella_entradas, dependencias_omitidas=True) -> bool:
+        """
+        Indica si el paso puede omitirse al reanudar. Un paso cuya dependencia se volvió a
+        ejecutar nunca se omite, porque sus entradas vienen de esa nueva ejecución.
+        """
+        if not self.reanudar:
+            return False
+        previo = self.anterior.get("pasos", {}).get(nombre)
+        motivo = None
+        if not dependencias_omitidas:
+            motivo = "una dependencia se volvió a ejecutar"
+        elif not previo:
+            motivo = "sin registro previo"
+        elif not previo.get("resultado"):
+            motivo = "falló en la ejecución anterior"
+        elif previo.get("huella_entradas") != huella_entradas:
+            motivo = "sus entradas cambiaron"
+        else:
+            for ruta, sha in previo.get("archivos", {}).items():
+                if not Path(ruta).is_file() or huella_archivo(ruta) != sha:
+                    motivo = f"la salida {ruta} ya no está o cambió"
+                    break
+        if motivo:
+            logger.info(f"Reanudación: se ejecuta '{nombre}' ({motivo})")
+            return False
+        return True
+
+    def restaurar(self, nombre):
+        """Restaura en variables_globales las salidas registradas del paso y lo copia al manifiesto."""
+        previo = self.anterior["pasos"][nombre]
+        for atributo, valor in previo.get("salidas", {}).items():
+            setattr(vg, atributo, valor)
+        self._guardar(nombre, dict(previo, omitido=True))
+        logger.info(f"Paso '{nombre}' omitido: se reutilizan sus salidas de la ejecución anterior")
+
+    def restaurar_parcial(self, nombre, huella_entradas, atributos) -> bool:
+        """
+        Restaura en variables_globales el avance parcial (`atributos`) de un paso que no se
+        puede omitir, si la ejecución anterior lo registró con las mismas entradas. Permite
+        que un paso con operaciones independientes (ej. la carga por moneda) retome solo
+        las que quedaron pendientes.
+        """
+        if not self.reanudar:
+            return False
+        previo = self.anterior.get("pasos", {}).get(nombre)
+        if not previo or previo.get("huella_entradas") != huella_entradas:
+            return False
+        salidas = previo.get("salidas", {})
+        restaurados = [atributo for atributo in atributos if salidas.get(atributo)]
+        for atributo in restaurados:
+            setattr(vg, atributo, salidas[atributo])
+        if restaurados:
+            logger.info(f"Paso '{nombre}': se retoma el avance de la ejecución anterior ({', '.join(restaurados)})")
+        return bool(restaurados)
+
+    def registrar(self, nombre, resultado, mensaje, huella_entradas, salidas):
+        """Registra el resultado del paso con sus salidas y el hash de los archivos que generó."""
+        valores = {atributo: _serializable(getattr(vg, atributo, None)) for atributo in salidas}
+        archivos = {}
+        for valor in valores.values():
+            for ruta in _rutas(valor):
+                archivos[ruta] = huella_archivo(ruta)
+        self._guardar(nombre, {
+            "resultado": bool(resultado),
+            "mensaje": str(mensaje),
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "huella_entradas": huella_entradas,
+            "salidas": valores,
+            "archivos": archivos,
+        })
+
+    def finalizar(self, completado):
+        self.datos["completado"] = bool(completado)
+        self.datos["fin"] = datetime.now().isoformat(timespec="seconds")
+        self._guardar()
@@ -0,0 +1,206 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger("Utils - Orquestador DAG")
+
+# Políticas de fallo de un nodo
+DETENER = "detener"      # no se lanza ningún nodo nuevo; los que están en curso terminan
+CONTINUAR = "continuar"  # solo se cancelan los nodos que dependen del que falló
+POLITICAS_FALLO = (DETENER, CONTINUAR)
+
+# Estados finales de un nodo
+OK, FALLIDO, TIMEOUT, OMITIDO, CANCELADO = "ok", "fallido", "timeout", "omitido", "cancelado"
+ESTADOS_EXITOSOS = (OK, OMITIDO)
+
+
+class Nodo:
+    """
+    Paso del pipeline: una función bot_run(cfg, mensaje) -> (resultado, mensaje).
+
+    Las aristas del grafo son artefactos: un nodo depende de los nodos que producen
+    (`salidas`, atributos de variables_globales) lo que él consume (`entradas` con prefijo
+    "vg."). `depende_de` agrega dependencias explícitas por clave.
+    """
+
+    def __init__(self, clave, nombre, funcion, entradas=(), salidas=(), depende_de=(),
+                 timeout=None, politica_fallo=CONTINUAR):
+        if politica_fallo not in POLITICAS_FALLO:
+            raise ValueError(f"Política de fallo no soportada para {clave}: {politica_fallo}")
+        self.clave = clave
+        self.nombre = nombre
+        self.funcion = funcion
+        self.entradas = list(entradas)
+        self.salidas = list(salidas)
+        self.depende_de = list(depende_de)
+        self.timeout = timeout
+        self.politica_fallo = politica_fallo
+
+
+class ResultadoNodo:
+    def __init__(self, estado, resultado=False, mensaje="", segundos=0.0):
+        self.estado = estado
+        self.resultado = resultado
+        self.mensaje = mensaje
+        self.segundos = segundos
+
+    @property
+    def exitoso(self):
+        return self.estado in ESTADOS_EXITOSOS
+
+
+def configurar_nodos(nodos, cfg):
+    """
+    Aplica la sección [orquestador] de config.ini: una subsección por clave de nodo con
+    `timeout` (segundos) y `politica_fallo`.
+    """
+    config = cfg.get("orquestador", {}) if cfg else {}
+    for nodo in nodos:
+        config_nodo = config.get(nodo.clave, {})
+        if config_nodo.get("timeout"):
+            nodo.timeout = float(config_nodo["timeout"])
+        politica = config_nodo.get("politica_fallo")
+        if politica:
+            if politica not in POLITICAS_FALLO:
+                raise ValueError(f"Política de fallo no soportada para {nodo.clave}: {politica}")
+            nodo.politica_fallo = politica
+    return nodos
+
+
+class Orquestador:
+    """
+    Ejecuta un grafo de Nodo respetando dependencias: los nodos independientes corren en
+    paralelo con un máximo de `max_workers` hilos.
+
+    El timeout de un nodo marca el nodo como fallido y libera a sus dependientes de la
+    espera, pero el hilo no se puede interrumpir desde Python: sigue en segundo plano
+    hasta que la función retorne.
+    """
+
+    def __init__(self, nodos, max_workers=2):
+        self.nodos = {nodo.clave: nodo for nodo in nodos}
+        if len(self.nodos) != len(nodos):
+            raise ValueError("Hay nodos con la misma clave")
+        self.max_workers = max_workers
+        self.dependencias = self._calcular_dependencias()
+        self.orden = self._orden_topologico()
+
+    def _calcular_dependencias(self):
+        productores = {}
+        for nodo in self.nodos.values():
+            for salida in nodo.salidas:
+                productores.setdefault(salida, []).append(nodo.clave)
+        dependencias = {}
+        for nodo in self.nodos.values():
+            previas = set(nodo.depende_de)
+            for entrada in nodo.entradas:
+                if entrada.startswith("vg."):
+                    previas.update(productores.get(entrada[3:], []))
+            previas.discard(nodo.clave)
+            faltantes = previas - set(self.nodos)
+            if faltantes:
+                raise ValueError(f"{nodo.clave} depende de nodos inexistentes: {faltantes}")
+            dependencias[nodo.clave] = previas
+        return dependencias
+
+    def _orden_topologico(self):
+        """Orden de Kahn; conserva el orden de declaración entre nodos independientes."""
+        pendientes = {clave: set(previas) for clave, previas in self.dependencias.items()}
+        orden = []
+        while pendientes:
+            listos = [clave for clave in self.nodos if clave in pendientes and not pendientes[clave]]
+            if not listos:
+                raise ValueError(f"El grafo tiene un ciclo entre: {', '.join(pendientes)}")
+            for clave in listos:
+                orden.append(clave)
+                del pendientes[clave]
+            for previas in pendientes.values():
+                previas.difference_update(listos)
+        return orden
+
+    def ejecutar(self, cfg, omitir=None, al_terminar=None):
+        """
+        Ejecuta el grafo y retorna {clave: ResultadoNodo}.
+
+        :param omitir: Callable (nodo, dependencias_omitidas) -> bool, para saltar nodos
+                       (ej. reanudación con el manifiesto). Se llama en el hilo principal.
+        :param al_terminar: Callable (nodo, ResultadoNodo) -> bool; si retorna True no se
+                            lanzan más nodos (ej. recaudo sin cambios).
+        """
+        resultados = {}
+        en_curso = {}
+        detener = False
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bot")
+        try:
+            while True:
+                for clave in self.orden:
+                    if clave in resultados or any(c == clave for c, _ in en_curso.values()):
+                        continue
+                    nodo = self.nodos[clave]
+                    previas = self.dependencias[clave]
+                    if detener:
+                        resultados[clave] = ResultadoNodo(CANCELADO, mensaje="Ejecución detenida")
+                        continue
+                    if any(p in resultados and not resultados[p].exitoso for p in previas):
+                        resultados[clave] = ResultadoNodo(CANCELADO, mensaje="Falló una dependencia")
+                        logger.warning(f"{nodo.nombre} cancelado: falló una de sus dependencias")
+                        continue
+                    if not all(p in resultados for p in previas):
+                        continue
+                    dependencias_omitidas = all(resultados[p].estado == OMITIDO for p in previas)
+                    if omitir and omitir(nodo, dependencias_omitidas):
+                        resultados[clave] = ResultadoNodo(OMITIDO, True, "Omitido")
+                        if al_terminar and al_terminar(nodo, resultados[clave]):
+                            detener = True
+                        continue
+                    logger.info(f"==================== INICIANDO {nodo.nombre} ====================")
+                    futuro = executor.submit(nodo.funcion, cfg, nodo.nombre)
+                    en_curso[futuro] = (clave, time.monotonic())
+
+                if not en_curso:
+                    if all(clave in resultados for clave in self.nodos):
+                        break
+                    # Un nodo omitido pudo liberar a otros: se vuelve a recorrer el orden
+                    continue
+
+                terminados, _ = wait(en_curso, timeout=self._espera_maxima(en_curso), return_when=FIRST_COMPLETED)
+                ahora = time.monotonic()
+                for futuro in list(en_curso):
+                    clave, inicio = en_curso[futuro]
+                    nodo = self.nodos[clave]
+                    if futuro in terminados:
+                        resultado = self._resultado(futuro, ahora - inicio)
+                    elif nodo.timeout and ahora - inicio >= nodo.timeout:
+                        resultado = ResultadoNodo(TIMEOUT, False, f"Timeout de {nodo.timeout:g}s", ahora - inicio)
+                        logger.error(f"{nodo.nombre} superó su timeout de {nodo.timeout:g}s")
+                    else:
+                        continue
+                    del en_curso[futuro]
+                    resultados[clave] = resultado
+                    logger.info(f"{nodo.nombre}: {resultado.estado} en {resultado.segundos:.1f}s")
+                    if not resultado.exitoso and nodo.politica_fallo == DETENER:
+                        logger.error(f"{nodo.nombre} falló con política '{DETENER}': no se lanzan más nodos")
+                        detener = True
+                    if al_terminar and al_terminar(nodo, resultado):
+                        detener = True
+        finally:
+            # No se espera a los hilos que superaron su timeout
+            executor.shutdown(wait=False, cancel_futures=True)
+        return {clave: resultados[clave] for clave in self.orden}
+
+    def _espera_maxima(self, en_curso):
+        """Segundos hasta el próximo timeout de los nodos en curso (None si no tienen)."""
+        restantes = [
+            self.nodos[clave].timeout - (time.monotonic() - inicio)
+            for clave, inicio in en_curso.values() if self.nodos[clave].timeout
+        ]
+        return max(0.0, min(restantes)) if restantes else None
+
+    @staticmethod
+    def _resultado(futuro, segundos):
+        try:
+            resultado, mensaje = futuro.result()
+            return ResultadoNodo(OK if resultado else FALLIDO, bool(resultado), mensaje, segundos)
+        except Exception as e:
+            logger.error(f"Error no controlado en nodo: {e}")
+            return ResultadoNodo(FALLIDO, False, f"Error: {e}", segundos)
@@ -0,0 +1,217 @@
+import json
+import logging
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+import trio
+from config.config import lista_config
+
+logger = logging.getLogger("Utils - Perfil Ligero")
+
+# Tipos de recurso de CDP (Network.ResourceType) que se bloquean por cada tipo configurado
+TIPOS_RECURSO = {
+    "imagenes": ["Image"],
+    "fuentes": ["Font"],
+    "media": ["Media"],
+}
+
+# Segundos máximos de espera a que la intercepción quede activa antes de navegar
+TIMEOUT_ACTIVACION = 15
+
+# Dominios de analítica/marketing conocidos que no intervienen en la carga del archivo
+DOMINIOS_ANALITICA = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googleadservices.com",
+    "hotjar.com", "omtrdc.net", "demdex.net", "adobedtm.com", "everesttech.net",
+    "facebook.net", "clarity.ms", "newrelic.com", "nr-data.net",
+]
+
+# Preferencias de plugins (Flash) que el perfil completo habilita y el ligero no necesita
+PREFERENCIAS_PLUGINS = (
+    "profile.default_content_setting_values.plugins",
+    "profile.content_settings.plugin_whitelist.adobe-flash-player",
+    "profile.content_settings.exceptions.plugins.*,*.per_resource.adobe-flash-player",
+)
+
+
+def config_navegador(cfg) -> dict:
+    return dict(cfg.get("navegador", {})) if cfg else {}
+
+
+def perfil_ligero_activo(cfg) -> bool:
+    return str(config_navegador(cfg).get("perfil_ligero", "False")).lower() == "true"
+
+
+def medicion_activa(cfg) -> bool:
+    return str(config_navegador(cfg).get("medir_red", "False")).lower() == "true"
+
+
+def reglas_bloqueo(cfg) -> dict:
+    """
+    Reglas de [navegador]: tipos de recurso de bloquear_tipos, dominios de analítica más
+    dominios_bloqueados, y dominios_permitidos (que nunca se bloquean, se revisan primero).
+    """
+    config = config_navegador(cfg)
+    tipos = set()
+    for tipo in lista_config(config.get("bloquear_tipos", "imagenes, fuentes, media")):
+        if tipo not in TIPOS_RECURSO:
+            logger.warning(f"Tipo de recurso a bloquear desconocido: {tipo}")
+            continue
+        tipos.update(TIPOS_RECURSO[tipo])
+    return {
+        "tipos": tipos,
+        "dominios": DOMINIOS_ANALITICA + lista_config(config.get("dominios_bloqueados", "")),
+        "permitidos": lista_config(config.get("dominios_permitidos", "")),
+    }
+
+
+def _en_dominios(host, dominios) -> bool:
+    return any(host == dominio or host.endswith(f".{dominio}") for dominio in dominios)
+
+
+def debe_bloquear(url, tipo_recurso, reglas) -> bool:
+    """Decide el bloqueo de una solicitud: primero los dominios permitidos, luego dominio y tipo."""
+    host = (urlsplit(url).hostname or "").lower()
+    if _en_dominios(host, reglas["permitidos"]):
+        return False
+    return _en_dominios(host, reglas["dominios"]) or tipo_recurso in reglas["tipos"]
+
+
+class BloqueadorRecursos:
+    """
+    Intercepta solicitudes con CDP Fetch (Fetch.enable + Fetch.requestPaused) sobre la
+    conexión bidi de Selenium, en un hilo propio con su loop de trio.
+
+    Solo se pausan las solicitudes candidatas (tipos de recurso bloqueados o dominios
+    bloqueados); cada una se decide con debe_bloquear y se falla como BlockedByClient o se
+    deja continuar. El hilo termina solo cuando se cierra el driver.
+    """
+
+    def __init__(self, driver, reglas):
+        self.driver = driver
+        self.reglas = reglas
+        self._listo = threading.Event()
+        self._error = None
+
+    def iniciar(self):
+        threading.Thread(target=self._ejecutar, name="bloqueador-recursos", daemon=True).start()
+        if not self._listo.wait(TIMEOUT_ACTIVACION):
+            raise TimeoutError("La intercepción de recursos no se activó a tiempo")
+        if self._error:
+            raise self._error
+
+    def _ejecutar(self):
+        try:
+            trio.run(self._escuchar)
+        except Exception as e:
+            if self._listo.is_set():
+                logger.debug(f"Intercepción de recursos finalizada: {e}")
+            else:
+                self._error = e
+                self._listo.set()
+
+    def _patrones(self, devtools):
+        patrones = [
+            devtools.fetch.RequestPattern(resource_type=devtools.network.ResourceType(tipo))
+            for tipo in sorted(self.reglas["tipos"])
+        ]
+        for dominio in self.reglas["dominios"]:
+            patrones += [
+                devtools.fetch.RequestPattern(url_pattern=f"*://{dominio}/*"),
+                devtools.fetch.RequestPattern(url_pattern=f"*://*.{dominio}/*"),
+            ]
+        return patrones
+
+    async def _escuchar(self):
+        async with self.driver.bidi_connection() as conexion:
+            session, devtools = conexion.session, conexion.devtools
+            await session.execute(devtools.fetch.enable(patterns=self._patrones(devtools)))
+            self._listo.set()
+            async with trio.open_nursery() as nursery:
+                async for evento in session.listen(devtools.fetch.RequestPaused):
+                    nursery.start_soon(self._resolver, session, devtools, evento)
+
+    async def _resolver(self, session, devtools, evento):
+        # Un error aquí (ej. solicitud ya cancelada por una navegación) no debe cerrar el
+        # nursery: la intercepción seguiría detenida el resto de la sesión
+        try:
+            if debe_bloquear(evento.request.url, evento.resource_type.value, self.reglas):
+                await session.execute(
+                    devtools.fetch.fail_request(evento.request_id, devtools.network.ErrorReason.BLOCKED_BY_CLIENT)
+                )
+            else:
+                await session.execute(devtools.fetch.continue_request(evento.request_id))
+        except Exception as e:
+            logger.warning(f"No se pudo resolver la solicitud interceptada {evento.request.url}: {e}")
+
+def aplicar_opciones(options, prefs, cfg):
+    """
+    Ajusta las opciones de Chrome antes de crear el driver: en perfil ligero quita las
+    preferencias de plugins (imágenes, fuentes y media se bloquean por tipo de recurso en
+    BloqueadorRecursos, respetando dominios_permitidos); con medir_red habilita el log de
+    performance para contar solicitudes, bloqueos y bytes.
+    """
+    if perfil_ligero_activo(cfg):
+        for clave in PREFERENCIAS_PLUGINS:
+            prefs.pop(clave, None)
+    if medicion_activa(cfg):
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def activar_bloqueo(driver, cfg):
+    """
+    Activa la intercepción de recursos en el driver ya creado (solo en perfil ligero).
+
+    :return: BloqueadorRecursos activo, o None si el perfil ligero está deshabilitado.
+    """
+    if not perfil_ligero_activo(cfg):
+        return None
+    reglas = reglas_bloqueo(cfg)
+    bloqueador = BloqueadorRecursos(driver, reglas)
+    bloqueador.iniciar()
+    logger.info(
+        f"Perfil ligero activo: tipos {sorted(reglas['tipos'])}, {len(reglas['dominios'])} dominios "
+        f"bloqueados, {len(reglas['permitidos'])} permitidos"
+    )
+    return bloqueador
+
+
+def medir_red(driver, cfg):
+    """
+    Lee el log de performance del driver y registra solicitudes realizadas, solicitudes
+    bloqueadas por tipo y bytes transferidos. Debe llamarse antes de driver.quit().
+
+    Los bytes de un recurso bloqueado no se conocen (nunca se descarga): el ahorro se
+    mide comparando los bytes transferidos de corridas con perfil_ligero activo e inactivo.
+    """
+    if not medicion_activa(cfg):
+        return None
+    solicitudes = 0
+    bytes_transferidos = 0
+    bloqueadas = Counter()
+    tipos = {}
+    for entrada in driver.get_log("performance"):
+        mensaje = json.loads(entrada["message"])["message"]
+        metodo, params = mensaje.get("method"), mensaje.get("params", {})
+        if metodo == "Network.requestWillBeSent":
+            solicitudes += 1
+            tipos[params.get("requestId")] = params.get("type", "Other")
+        elif metodo == "Network.loadingFinished":
+            bytes_transferidos += params.get("encodedDataLength", 0)
+        elif metodo == "Network.loadingFailed" and (
+            params.get("blockedReason") or params.get("errorText") == "net::ERR_BLOCKED_BY_CLIENT"
+        ):
+            bloqueadas[params.get("type") or tipos.get(params.get("requestId"), "Other")] += 1
+
+    metricas = {
+        "perfil_ligero": perfil_ligero_activo(cfg),
+        "solicitudes": solicitudes,
+        "bloqueadas": sum(bloqueadas.values()),
+        "bloqueadas_por_tipo": dict(bloqueadas),
+        "bytes_transferidos": bytes_transferidos,
+    }
+    logger.info(
+        f"Red del navegador: {solicitudes} solicitudes, {metricas['bloqueadas']} bloqueadas "
+        f"{dict(bloqueadas)}, {bytes_transferidos / 1024:.1f} KiB transferidos "
+        f"(perfil ligero: {'sí' if metricas['perfil_ligero'] else 'no'})"
+    )
+    return metricas
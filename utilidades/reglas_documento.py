@@ -0,0 +1,187 @@
+import logging
+import polars as pl
+from config.config import lista_config
+
+logger = logging.getLogger("Utils - Reglas Documento")
+
+# Caracteres permitidos en los nombres después de la limpieza
+PATRON_NOMBRE_INVALIDO = r"[^A-Z\sÑÁÉÍÓÚÜ]"
+
+# Columna con la máscara de violaciones (un bit por regla) que agrega el plan de Bot 02
+COLUMNA_VIOLACIONES = "_violaciones"
+
+# Bit de cada regla en la máscara, en el orden en que se reportan
+BITS_REGLAS = {
+    "longitud": 1,   # longitud del documento distinta a la de su tipo (o tipo sin longitud definida)
+    "tipo": 2,       # tipo de documento fuera de tipos_permitidos
+    "digitos": 4,    # documento con caracteres no numéricos en tipos_numericos
+    "ruc": 8,        # dígito verificador de RUC incorrecto
+    "bin": 16,       # BIN fuera de la lista para los tipos de tipos_bin
+    "nombre": 32,    # nombre vacío o con caracteres fuera del patrón permitido
+}
+
+# Pesos del módulo 11 de SUNAT para los 10 primeros dígitos del RUC
+PESOS_RUC = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+
+# Valores por defecto: reproducen las validaciones que tenía procesar_df
+LONGITUDES_POR_DEFECTO = {"DI": 8, "RUC": 11, "PT": 12, "CE": 9}
+TIPOS_PERMITIDOS_POR_DEFECTO = ["DI", "RUC"]
+TIPOS_NUMERICOS_POR_DEFECTO = ["DI", "RUC"]
+BINES_POR_DEFECTO = ["489486", "422826", "519115", "483179"]
+TIPOS_BIN_POR_DEFECTO = ["DI", "PT", "CE"]
+RECHAZO_POR_DEFECTO = ["longitud", "tipo", "digitos", "ruc"]
+
+
+def _validar_nombres(nombres, origen):
+    desconocidas = [nombre for nombre in nombres if nombre not in BITS_REGLAS]
+    if desconocidas:
+        raise ValueError(f"Reglas de validación desconocidas en {origen}: {desconocidas}")
+    return nombres
+
+
+def digito_verificador_ruc(ruc: pl.Expr) -> pl.Expr:
+    """
+    Dígito verificador esperado (módulo 11) de un RUC a partir de sus 10 primeros dígitos.
+    Nulo si alguno de esos caracteres no es un dígito.
+    """
+    suma = pl.sum_horizontal([
+        ruc.str.slice(posicion, 1).cast(pl.Int32, strict=False) * peso
+        for posicion, peso in enumerate(PESOS_RUC)
+    ])
+    # 11 - resto: 10 se escribe 0 y 11 se escribe 1
+    return (11 - suma % 11) % 10
+
+
+class ReglasDocumento:
+    """
+    Reglas declarativas de validación del recaudo ([validacion] en config.ini).
+
+    Todas las reglas se compilan en una sola expresión Polars que calcula por fila una
+    máscara de bits (BITS_REGLAS) con las reglas que incumple, dentro del mismo plan de
+    procesar_df. Las reglas de `rechazo` deciden qué filas van al archivo de rechazados;
+    el resto solo se reporta en el log.
+
+    Las expresiones normalizan sus columnas (espacios y mayúsculas), así que se pueden
+    evaluar antes o después de la limpieza de Bot 02.
+    """
+
+    def __init__(self, reglas=None, longitudes=None, tipos_permitidos=None, tipos_numericos=None,
+                 bines=None, tipos_bin=None, rechazo=None, patron_nombre=PATRON_NOMBRE_INVALIDO,
+                 excluir_rechazados=False):
+        self.reglas = _validar_nombres(list(reglas if reglas is not None else BITS_REGLAS), "reglas")
+        self.longitudes = dict(longitudes if longitudes is not None else LONGITUDES_POR_DEFECTO)
+        self.tipos_permitidos = list(tipos_permitidos if tipos_permitidos is not None else TIPOS_PERMITIDOS_POR_DEFECTO)
+        self.tipos_numericos = list(tipos_numericos if tipos_numericos is not None else TIPOS_NUMERICOS_POR_DEFECTO)
+        self.bines = list(bines if bines is not None else BINES_POR_DEFECTO)
+        self.tipos_bin = list(tipos_bin if tipos_bin is not None else TIPOS_BIN_POR_DEFECTO)
+        self.rechazo = _validar_nombres(list(rechazo if rechazo is not None else RECHAZO_POR_DEFECTO), "rechazo")
+        self.patron_nombre = patron_nombre
+        self.excluir_rechazados = excluir_rechazados
+
+    @classmethod
+    def desde_config(cls, cfg):
+        """Construye las reglas desde la sección [validacion]; sin sección usa los valores por defecto."""
+        config = dict(cfg.get("validacion", {})) if cfg else {}
+        longitudes = None
+        if "longitudes" in config:
+            longitudes = {}
+            for par in lista_config(config["longitudes"]):
+                tipo, _, longitud = par.partition(":")
+                longitudes[tipo.strip().upper()] = int(longitud)
+
+        def lista(clave, mayusculas=False):
+            if clave not in config:
+                return None
+            valores = lista_config(config[clave])
+            return [v.upper() for v in valores] if mayusculas else valores
+
+        return cls(
+            reglas=lista("reglas"),
+            longitudes=longitudes,
+            tipos_permitidos=lista("tipos_permitidos", mayusculas=True),
+            tipos_numericos=lista("tipos_numericos", mayusculas=True),
+            bines=lista("bines"),
+            tipos_bin=lista("tipos_bin", mayusculas=True),
+            rechazo=lista("rechazo"),
+            patron_nombre=config.get("patron_nombre") or PATRON_NOMBRE_INVALIDO,
+            excluir_rechazados=str(config.get("excluir_rechazados", "False")).lower() == "true",
+        )
+
+    def _condiciones(self, columnas):
+        """Expresión booleana (True = incumple) de cada regla aplicable a las columnas."""
+        tipo = pl.col("Tipo Documento").cast(pl.Utf8).str.strip_chars().str.to_uppercase()
+        numero = pl.col("Numero Documento").cast(pl.Utf8).str.strip_chars()
+        condiciones = {
+            "longitud": numero.str.len_chars() != tipo.replace_strict(self.longitudes, default=0),
+            "tipo": ~tipo.is_in(self.tipos_permitidos),
+            "digitos": tipo.is_in(self.tipos_numericos) & ~numero.str.contains(r"^\d+$"),
+            "ruc": (
+                (tipo == "RUC") & (numero.str.len_chars() == 11)
+                & (numero.str.slice(10, 1).cast(pl.Int32, strict=False) != digito_verificador_ruc(numero))
+            ),
+        }
+        if "Bin" in columnas:
+            condiciones["bin"] = (
+                tipo.is_in(self.tipos_bin)
+                & ~pl.col("Bin").cast(pl.Utf8).str.strip_chars().is_in(self.bines)
+            )
+        if "Nombres" in columnas:
+            # (?i) evita pasar el nombre a mayúsculas solo para evaluar el patrón
+            nombre = pl.col("Nombres").cast(pl.Utf8)
+            condiciones["nombre"] = (
+                (nombre.str.strip_chars() == "") | nombre.str.contains(f"(?i){self.patron_nombre}")
+            )
+        return condiciones
+
+    def expr_violaciones(self, columnas) -> pl.Expr:
+        """
+        Máscara UInt16 con un bit por regla incumplida (0 = fila válida). Un valor nulo en
+        las columnas evaluadas cuenta como incumplimiento.
+
+        :param columnas: Columnas disponibles en el plan (las reglas de Bin y nombre se
+                         omiten si su columna no existe).
+        """
+        condiciones = self._condiciones(columnas)
+        bits = [
+            condiciones[regla].fill_null(True).cast(pl.UInt16) * BITS_REGLAS[regla]
+            for regla in self.reglas if regla in condiciones
+        ]
+        if not bits:
+            return pl.lit(0, dtype=pl.UInt16).alias(COLUMNA_VIOLACIONES)
+        return pl.sum_horizontal(bits).cast(pl.UInt16).alias(COLUMNA_VIOLACIONES)
+
+    @property
+    def mascara_rechazo(self) -> int:
+        return sum(BITS_REGLAS[regla] for regla in self.rechazo)
+
+    def expr_rechazada(self) -> pl.Expr:
+        """True para las filas que incumplen alguna regla de rechazo."""
+        return (pl.col(COLUMNA_VIOLACIONES) & self.mascara_rechazo) != 0
+
+    @staticmethod
+    def expr_motivos() -> pl.Expr:
+        """Nombres de las reglas incumplidas separados por coma (ej. "longitud,ruc")."""
+        return pl.concat_str([
+            pl.when((pl.col(COLUMNA_VIOLACIONES) & bit) != 0).then(pl.lit(regla))
+            for regla, bit in BITS_REGLAS.items()
+        ], separator=",", ignore_nulls=True).alias("Motivos")
+
+    @staticmethod
+    def conteos(df: pl.DataFrame) -> dict:
+        """Filas que incumplen cada regla (solo reglas con incumplimientos)."""
+        fila = df.select([
+            ((pl.col(COLUMNA_VIOLACIONES) & bit) != 0).sum().alias(regla)
+            for regla, bit in BITS_REGLAS.items()
+        ]).row(0, named=True)
+        return {regla: total for regla, total in fila.items() if total}
+
+    def separar(self, df: pl.DataFrame):
+        """
+        Separa el DataFrame procesado (con la columna de violaciones) en aceptados y
+        rechazados. Los aceptados salen sin la columna; los rechazados la reemplazan por
+        sus motivos. Con excluir_rechazados=False los aceptados son todas las filas.
+        """
+        rechazada = self.expr_rechazada()
+        rechazados = df.filter(rechazada).with_columns(self.expr_motivos()).drop(COLUMNA_VIOLACIONES)
+        aceptados = df.filter(~rechazada) if self.excluir_rechazados else df
+        return aceptados.drop(COLUMNA_VIOLACIONES), rechazados
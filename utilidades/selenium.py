@@ -1,21 +1,26 @@
 import logging
 import os
 import tempfile
+import queue
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium_stealth import stealth
+from utilidades.chromedriver_cache import obtener_chromedriver
 
 logger = logging.getLogger("Utils - Selenium")
 
 class SeleniumHelper:
-    def __init__(self, headless=True, profilename="default"):
+    def __init__(self, headless=True, profilename="default", cfg=None):
         chrome_options = Options()
         
         # Lista de User-Agents reales para rotar
@@ -71,7 +76,7 @@ class SeleniumHelper:
 
         try:
             self.driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()), 
+                service=Service(obtener_chromedriver(cfg)), 
                 options=chrome_options
             )
             
@@ -209,4 +214,168 @@ class SeleniumHelper:
         try:
             self.driver.quit()
         except Exception as e:
-            logger.warning(f"Error al cerrar navegador: {e}")
\ No newline at end of file
+            logger.warning(f"Error al cerrar navegador: {e}")
+
+
+class SeleniumPool:
+    """
+    Pool de drivers de Chrome pre-lanzados en paralelo por `fabrica(indice)`, que los
+    entrega ya configurados (stealth, opciones del bot).
+
+    Los drivers se entregan con el context manager `obtener()`; al devolverse se borran el
+    storage de cada origen visitado y todas las cookies, y se reciclan (cerrar y lanzar uno
+    nuevo) al alcanzar `max_usos` o si fallan el chequeo de salud. Si un lanzamiento falla,
+    el cupo vuelve vacío a la cola y se relanza en el siguiente `obtener()`: el pool nunca
+    pierde capacidad.
+    """
+
+    def __init__(self, fabrica, tamano=None, max_usos=None, cfg=None):
+        config = dict(cfg.get("selenium_pool", {})) if cfg else {}
+        self.fabrica = fabrica
+        self.tamano = int(tamano if tamano is not None else config.get("tamano", 2))
+        self.max_usos = int(max_usos if max_usos is not None else config.get("max_usos", 20))
+        # Cola de cupos (indice, driver); driver None = cupo libre a relanzar al entregarlo
+        self._disponibles = queue.Queue()
+        self._usos = {}
+        self._activos = {}
+        self._lock = threading.Lock()
+        self._cerrado = False
+
+        logger.info(f"Lanzando pool de {self.tamano} navegadores (máx. {self.max_usos} usos por driver)")
+        with ThreadPoolExecutor(max_workers=max(self.tamano, 1)) as executor:
+            for indice, driver in enumerate(executor.map(self._precalentar, range(self.tamano))):
+                self._disponibles.put((indice, driver))
+
+    def _lanzar(self, indice):
+        driver = self.fabrica(indice)
+        with self._lock:
+            self._usos[indice] = 0
+            self._activos[indice] = driver
+        return driver
+
+    def _precalentar(self, indice):
+        try:
+            return self._lanzar(indice)
+        except Exception as e:
+            logger.warning(f"No se pudo pre-lanzar el navegador {indice} del pool: {e}")
+            return None
+
+    def _cerrar_driver(self, indice, driver):
+        with self._lock:
+            self._usos.pop(indice, None)
+            self._activos.pop(indice, None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error al cerrar navegador {indice} del pool: {e}")
+
+    def _reciclar(self, indice, driver, motivo):
+        logger.info(f"Reciclando navegador {indice} del pool: {motivo}")
+        self._cerrar_driver(indice, driver)
+        return self._lanzar(indice)
+
+    @staticmethod
+    def saludable(driver) -> bool:
+        """Chequeo de salud: el driver responde y conserva al menos una ventana."""
+        try:
+            return driver.execute_script("return 1") == 1 and bool(driver.window_handles)
+        except Exception as e:
+            logger.warning(f"Navegador del pool no responde: {e}")
+            return False
+
+    @staticmethod
+    def origenes_visitados(driver) -> set:
+        """Orígenes http(s) del historial de la pestaña actual y de los dominios con cookies."""
+        urls = [entrada.get("url", "") for entrada in driver.execute_cdp_cmd("Page.getNavigationHistory", {})["entries"]]
+        for cookie in driver.execute_cdp_cmd("Storage.getCookies", {}).get("cookies", []):
+            dominio = cookie["domain"].lstrip(".")
+            urls += [f"https://{dominio}", f"http://{dominio}"]
+        origenes = set()
+        for url in urls:
+            partes = urlsplit(url)
+            if partes.scheme in ("http", "https") and partes.netloc:
+                origenes.add(f"{partes.scheme}://{partes.netloc}")
+        return origenes
+
+    @classmethod
+    def reiniciar_estado(cls, driver):
+        """
+        Cierra las pestañas extra, borra el storage (local, session, IndexedDB, cache,
+        service workers) de cada origen visitado y todas las cookies, y deja una pestaña en
+        blanco sin historial.
+        """
+        ventanas = driver.window_handles
+        origenes = set()
+        for ventana in ventanas[1:]:
+            driver.switch_to.window(ventana)
+            origenes |= cls.origenes_visitados(driver)
+            driver.close()
+        driver.switch_to.window(ventanas[0])
+        origenes |= cls.origenes_visitados(driver)
+        for origen in origenes:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origen, "storageTypes": "all"})
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+        driver.execute_cdp_cmd("Page.resetNavigationHistory", {})
+        logger.debug(f"Estado del navegador reiniciado ({len(origenes)} orígenes limpiados)")
+
+    @contextmanager
+    def obtener(self, timeout=None):
+        """
+        Entrega un driver del pool y lo devuelve (limpio o reciclado) al salir.
+
+        :param timeout: Segundos máximos de espera por un driver libre (None = sin límite).
+        """
+        if self._cerrado:
+            raise RuntimeError("El pool de navegadores está cerrado")
+        indice, driver = self._disponibles.get(timeout=timeout)
+        try:
+            if driver is None:
+                driver = self._lanzar(indice)
+            elif not self.saludable(driver):
+                driver = self._reciclar(indice, driver, "chequeo de salud fallido")
+        except Exception:
+            # El cupo vuelve libre: el siguiente obtener() intenta lanzarlo otra vez
+            self._disponibles.put((indice, None))
+            raise
+        try:
+            yield driver
+        finally:
+            self._devolver(indice, driver)
+
+    def _devolver(self, indice, driver):
+        if self._cerrado:
+            self._cerrar_driver(indice, driver)
+            return
+        with self._lock:
+            self._usos[indice] = self._usos.get(indice, 0) + 1
+            usos = self._usos[indice]
+        try:
+            if usos >= self.max_usos:
+                logger.info(f"Reciclando navegador {indice} del pool: {usos} usos")
+                self._cerrar_driver(indice, driver)
+                driver = None
+                driver = self._lanzar(indice)
+            else:
+                self.reiniciar_estado(driver)
+        except Exception as e:
+            logger.warning(f"Error al limpiar o relanzar el navegador {indice} del pool, se relanza en el siguiente uso: {e}")
+            if driver is not None:
+                self._cerrar_driver(indice, driver)
+            driver = None
+        self._disponibles.put((indice, driver))
+
+    def cerrar(self):
+        """Cierra todos los navegadores del pool."""
+        self._cerrado = True
+        with self._lock:
+            drivers = list(self._activos.items())
+        for indice, driver in drivers:
+            self._cerrar_driver(indice, driver)
+        logger.info("Pool de navegadores cerrado")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cerrar()
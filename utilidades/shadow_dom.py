@@ -0,0 +1,138 @@
+import logging
+from selenium.common.exceptions import StaleElementReferenceException
+
+logger = logging.getLogger("Utils - Shadow DOM")
+
+# Separador de saltos a shadowRoot dentro de una ruta: "host >>> host_interno >>> selector"
+SEPARADOR_SHADOW = ">>>"
+
+# Resuelve todos los saltos de shadowRoot de una ruta en una sola llamada a execute_script.
+# arguments: [segmentos, texto exacto a filtrar o null, retornar todos los elementos]
+SCRIPT_RESOLVER = """
+const segmentos = arguments[0], texto = arguments[1], todos = arguments[2];
+let raiz = document;
+for (let i = 0; i < segmentos.length - 1; i++) {
+    const host = raiz.querySelector(segmentos[i]);
+    if (!host || !host.shadowRoot) return todos ? [] : null;
+    raiz = host.shadowRoot;
+}
+let encontrados = Array.from(raiz.querySelectorAll(segmentos[segmentos.length - 1]));
+if (texto !== null) encontrados = encontrados.filter(e => e.textContent.trim() === texto);
+if (todos) return encontrados;
+return encontrados.length ? encontrados[0] : null;
+"""
+
+
+def segmentos(ruta: str) -> list:
+    """Divide una ruta "a >>> b >>> c" en sus selectores CSS."""
+    return [segmento.strip() for segmento in ruta.split(SEPARADOR_SHADOW)]
+
+
+class ResolutorShadow:
+    """
+    Resuelve rutas declarativas a través de shadowRoots e iframes con el mínimo de
+    llamadas a WebDriver.
+
+    - Una ruta str ("host >>> host_interno >>> selector") se resuelve en el frame actual
+      con un único execute_script, sin importar cuántos shadowRoots atraviese.
+    - Una ruta tupla ("... >>> iframe", "iframe#interno", "selector") es absoluta: parte
+      del documento principal y cambia de frame entre cada elemento de la tupla; cada
+      frame cuesta un execute_script más el switch_to.frame.
+
+    Los elementos resueltos se guardan en cache por frame y ruta. Selenium invalida las
+    referencias al descargarse el documento, así que la cache vale por carga de página:
+    ante un StaleElementReferenceException se vacía y la ruta se resuelve de nuevo.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._cache = {}
+        self._contexto = ()
+        self.llamadas = 0
+
+    def invalidar(self):
+        """Vacía la cache (usar después de una navegación)."""
+        self._cache.clear()
+
+    def contenido_principal(self):
+        """Vuelve al documento principal."""
+        self.driver.switch_to.default_content()
+        self._contexto = ()
+
+    def _resolver_en_frame(self, ruta, texto, todos, usar_cache):
+        clave = (self._contexto, ruta, texto, todos)
+        if usar_cache and clave in self._cache:
+            return self._cache[clave]
+        self.llamadas += 1
+        resultado = self.driver.execute_script(SCRIPT_RESOLVER, segmentos(ruta), texto, todos)
+        if resultado:
+            self._cache[clave] = resultado
+        return resultado
+
+    def _entrar_frame(self, frame, elemento):
+        self.driver.switch_to.frame(elemento)
+        self._contexto += (frame,)
+
+    def _resolver(self, ruta, texto, todos, usar_cache):
+        if isinstance(ruta, (tuple, list)):
+            *frames, ruta = ruta
+            self.contenido_principal()
+            for frame in frames:
+                elemento = self._resolver_en_frame(frame, None, False, usar_cache)
+                if elemento is None:
+                    return [] if todos else None
+                self._entrar_frame(frame, elemento)
+        return self._resolver_en_frame(ruta, texto, todos, usar_cache)
+
+    def resolver(self, ruta, texto=None, todos=False, usar_cache=True):
+        """
+        Resuelve la ruta y retorna el elemento (o la lista con todos=True), o None si no existe.
+
+        :param texto: Si se indica, solo se consideran elementos cuyo texto (trim) es igual.
+        :param usar_cache: Si es False se ignora la cache al leer (el resultado sí se guarda).
+        """
+        try:
+            return self._resolver(ruta, texto, todos, usar_cache)
+        except StaleElementReferenceException:
+            logger.debug(f"Referencia obsoleta al resolver {ruta}, se vacía la cache y se reintenta")
+            self.invalidar()
+            return self._resolver(ruta, texto, todos, False)
+
+    def condicion(self, ruta, texto=None, todos=False, usar_cache=False):
+        """
+        Condición para EsperaAdaptativa/WebDriverWait: resuelve la ruta y retorna el
+        resultado cuando existe. Por defecto no lee la cache, porque se espera justamente
+        a un elemento que puede no existir todavía en la página actual.
+        """
+        def _condicion(driver):
+            return self.resolver(ruta, texto, todos, usar_cache=usar_cache)
+        return _condicion
+
+    def entrar(self, ruta, espera=None, paso=None, maximo=None):
+        """
+        Resuelve un iframe desde el frame actual y cambia el contexto del driver a él.
+        Con `espera` (EsperaAdaptativa) se espera a que el iframe exista bajo el nombre `paso`.
+        """
+        if espera is not None:
+            elemento = espera.esperar(paso or ruta, self.condicion(ruta), maximo)
+        else:
+            elemento = self.resolver(ruta)
+            if elemento is None:
+                raise LookupError(f"No se encontró el iframe {ruta}")
+        self._entrar_frame(ruta[-1] if isinstance(ruta, (tuple, list)) else ruta, elemento)
+
+    def ejecutar(self, ruta, accion, texto=None):
+        """
+        Aplica `accion(elemento)` sobre la ruta (usando la cache). Si el elemento cacheado
+        quedó obsoleto se resuelve de nuevo una vez.
+        """
+        for intento in range(2):
+            elemento = self.resolver(ruta, texto, usar_cache=intento == 0)
+            if elemento is None:
+                raise LookupError(f"No se encontró el elemento {ruta}")
+            try:
+                return accion(elemento)
+            except StaleElementReferenceException:
+                if intento:
+                    raise
+                self.invalidar()
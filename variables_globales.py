@@ -2,4 +2,15 @@
 
 system_exception = ""
 business_exception = ""
-archivo_recaudo = ""
\ No newline at end of file
+archivo_recaudo = ""
+archivos_txt = {}
+archivo_intermedio = None
+archivo_rechazados = None
+recaudo_sha256 = ""
+bytes_descargados = 0
+archivos_entrada = []
+huellas_pendientes = {}
+sin_cambios = False
+envios_pendientes = None
+sin_novedades = False
+monedas_cargadas = []